@@ -1,7 +1,23 @@
+import importlib.util
 import math
+import os
 import numpy as np
 import pandas as pd
-from scipy.stats import norm
+
+
+def _load_normal():
+    """
+    The shared standard normal backend from Final Programs, loaded by file path so
+    importing this module leaves sys.path and sys.modules alone.
+    """
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Final Programs", "normal.py")
+    spec = importlib.util.spec_from_file_location("normal", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+normal = _load_normal()
 
 """
 
@@ -35,18 +51,18 @@ def black_scholes(S, X, T, t, r, sigma):
     d1 = (np.log(S / X) + (r + 0.5 * sigma ** 2) * tau) / (sigma * np.sqrt(tau))
     d2 = d1 - sigma * np.sqrt(tau)
     
-    call_price = S * norm.cdf(d1) - np.exp(-r * tau) * X * norm.cdf(d2)
-    put_price = np.exp(-r * tau) * X * norm.cdf(-d2) - S * norm.cdf(-d1)
+    call_price = S * normal.cdf(d1) - np.exp(-r * tau) * X * normal.cdf(d2)
+    put_price = np.exp(-r * tau) * X * normal.cdf(-d2) - S * normal.cdf(-d1)
     
-    call_delta = norm.cdf(d1)
-    put_delta = -norm.cdf(-d1)
+    call_delta = normal.cdf(d1)
+    put_delta = -normal.cdf(-d1)
     
-    gamma = norm.pdf(d1) / (S * sigma * np.sqrt(tau))
-    vega = S * norm.pdf(d1) * np.sqrt(tau)
-    theta_call = - (S * norm.pdf(d1) * sigma) / (2 * np.sqrt(tau)) - r * X * np.exp(-r * tau) * norm.cdf(d2)
-    theta_put = - (S * norm.pdf(d1) * sigma) / (2 * np.sqrt(tau)) + r * X * np.exp(-r * tau) * norm.cdf(-d2)
-    rho_call = X * tau * np.exp(-r * tau) * norm.cdf(d2)
-    rho_put = -X * tau * np.exp(-r * tau) * norm.cdf(-d2)
+    gamma = normal.pdf(d1) / (S * sigma * np.sqrt(tau))
+    vega = S * normal.pdf(d1) * np.sqrt(tau)
+    theta_call = - (S * normal.pdf(d1) * sigma) / (2 * np.sqrt(tau)) - r * X * np.exp(-r * tau) * normal.cdf(d2)
+    theta_put = - (S * normal.pdf(d1) * sigma) / (2 * np.sqrt(tau)) + r * X * np.exp(-r * tau) * normal.cdf(-d2)
+    rho_call = X * tau * np.exp(-r * tau) * normal.cdf(d2)
+    rho_put = -X * tau * np.exp(-r * tau) * normal.cdf(-d2)
     
     data = {
         "Metric": ["Price", "Delta", "Gamma", "Vega", "Theta", "Rho"],
@@ -98,9 +114,9 @@ def option_delta(S, strike, r, sigma, T, t, option_type = 'call'):
     d1 = (np.log(S / strike) + (r + 0.5 * sigma ** 2) * tau) / (sigma * np.sqrt(tau))
 
     if option_type == "call":
-        delta = norm.cdf(d1)
+        delta = normal.cdf(d1)
     elif option_type == "put":
-        delta = norm.cdf(d1)-1
+        delta = normal.cdf(d1)-1
     else:
         raise ValueError("option_type must be 'call' or 'put' -lowercase-")
 
@@ -185,8 +201,9 @@ def gbm_lognormal_stats(x, X_t, mu, sigma, T_minus_t):
     
     # Calculate the CDF and PDF at x
     # Note: For x > 0; x can be a scalar or an array.
-    cdf = norm.cdf(np.log(x), loc=mu_1, scale=sigma_1)
-    pdf = norm.pdf(np.log(x), loc=mu_1, scale=sigma_1) / x  # Adjusted for lognormal
+    z = (np.log(x) - mu_1) / sigma_1
+    cdf = normal.cdf(z)
+    pdf = normal.pdf(z) / (sigma_1 * x)  # Adjusted for lognormal
     
     # Compute moments of the lognormal distribution
     mean = np.exp(mu_1 + 0.5 * sigma_1**2)
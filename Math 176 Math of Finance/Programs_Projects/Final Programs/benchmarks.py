@@ -0,0 +1,325 @@
+"""
+
+Reproducible benchmarks for the pricing, implied vol, volatility and CSV paths.
+
+Every case builds deterministic synthetic inputs (fixed seeds) outside the
+timed region, then times the call `repeat` times and keeps the best and the
+median run. Peak memory is measured in one extra, untimed run under
+tracemalloc (which NumPy reports its buffers to), so tracing never slows the
+timings. Scalar paths loop over Python objects and stop at 1e4 contracts; batch
+paths go up to 1e7. Nothing touches the network.
+
+Sample code:
+
+python benchmarks.py run --max-size 1e5 --out baseline.json
+python benchmarks.py run --max-size 1e5 --out today.json
+python benchmarks.py compare baseline.json today.json --threshold .15
+python benchmarks.py run --only price --max-size 1e7
+
+"""
+
+import argparse
+import atexit
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import scipy
+import normal
+import hist_vol
+import midterm2
+from bs_chain import price_chain
+from implied_vol import implied_vol_chain
+from ingest import read_columns
+from realized_vol import rolling_vol
+
+
+SIZES = (10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7)
+SCALAR_SIZES = (10 ** 3, 10 ** 4)
+
+CASES = {}
+
+
+def case(name, unit, sizes=SIZES):
+    """
+    Register a benchmark. The decorated function takes n and returns a
+    zero-argument callable doing the timed work on inputs it already built.
+    """
+    def register(setup):
+        CASES[name] = {"setup": setup, "unit": unit, "sizes": tuple(sizes)}
+        return setup
+    return register
+
+
+def synthetic_chain(n, seed=0):
+    """
+    n option contracts with realistic spreads of moneyness, expiry and vol,
+    and their Black-Scholes premiums.
+    """
+    rng = np.random.default_rng(seed)
+    S = np.full(n, 100.0)
+    K = np.round(100 * np.exp(rng.normal(0, 0.2, n)), 2)
+    T = rng.choice([7, 14, 30, 60, 91, 182, 365, 730], n) / 365
+    r = np.full(n, 0.04)
+    sigma = rng.uniform(0.1, 0.6, n)
+    is_call = rng.random(n) < 0.5
+    kind = np.where(is_call, "call", "put")
+    premium = price_chain(S, K, T, r, sigma, is_call)["price"]
+    return {"S": S, "K": K, "T": T, "r": r, "sigma": sigma, "kind": kind, "premium": premium}
+
+
+def synthetic_prices(n, seed=0, S0=100.0, vol=0.25):
+    """
+    Daily closes of length n from a driftless log random walk (a drift would
+    underflow or overflow over 1e7 steps).
+    """
+    rng = np.random.default_rng(seed)
+    steps = rng.normal(0.0, vol / np.sqrt(252), n - 1)
+    return S0 * np.exp(np.concatenate([[0.0], np.cumsum(steps)]))
+
+
+def synthetic_csv(n, directory, seed=0):
+    """
+    CSV in the layout the hist_vol loaders expect: header, then
+    index, close, daily change in percent.
+    """
+    path = os.path.join(directory, f"prices_{n}.csv")
+    if not os.path.exists(path):
+        close = synthetic_prices(n, seed)
+        change = np.concatenate([[0.0], np.diff(close) / close[:-1] * 100])
+        with open(path, "w") as f:
+            f.write("Day,Close,Change\n")
+            np.savetxt(f, np.column_stack([np.arange(n), close, change]), fmt=["%d", "%.4f", "%.4f%%"],
+                       delimiter=",")
+    return path
+
+
+# ---- pricing --------------------------------------------------------------
+
+@case("price/black_scholes_scalar", "contracts", SCALAR_SIZES)
+def _black_scholes_scalar(n):
+    c = synthetic_chain(n)
+    rows = list(zip(*(c[k].tolist() for k in ("S", "K", "T", "r", "sigma", "kind"))))
+    return lambda: [midterm2.black_scholes(S, K, T, 0, r, sigma, kind) for S, K, T, r, sigma, kind in rows]
+
+
+@case("price/black_scholes_array", "contracts")
+def _black_scholes_array(n):
+    c = synthetic_chain(n)
+    return lambda: midterm2.black_scholes(c["S"], c["K"], c["T"], 0, c["r"], c["sigma"], "call")
+
+
+@case("price/option_price_greeks_scalar", "contracts", SCALAR_SIZES)
+def _option_greeks_scalar(n):
+    c = synthetic_chain(n)
+    options = [hist_vol.Option(S, K, T, r, sigma, option_type=kind)
+               for S, K, T, r, sigma, kind in zip(*(c[k].tolist() for k in ("S", "K", "T", "r", "sigma", "kind")))]
+
+    def run():
+        for o in options:
+            o.S = o.S  # drop the cached d1/d2 so each pass does the full work
+            o.price(), o.delta(), o.gamma(), o.vega(), o.theta(), o.rho()
+    return run
+
+
+@case("price/price_chain", "contracts")
+def _price_chain(n):
+    c = synthetic_chain(n)
+    return lambda: price_chain(c["S"], c["K"], c["T"], c["r"], c["sigma"], c["kind"])
+
+
+# ---- implied vol ----------------------------------------------------------
+
+@case("iv/option_implied_volatility_scalar", "contracts", SCALAR_SIZES)
+def _iv_scalar(n):
+    c = synthetic_chain(n)
+    options = [hist_vol.Option(S, K, T, r, sigma, option_type=kind)
+               for S, K, T, r, sigma, kind in zip(*(c[k].tolist() for k in ("S", "K", "T", "r", "sigma", "kind")))]
+    premiums = c["premium"].tolist()
+    return lambda: [o.implied_volatility(p) for o, p in zip(options, premiums)]
+
+
+@case("iv/implied_vol_chain", "contracts", SIZES[:4])
+def _iv_chain(n):
+    c = synthetic_chain(n)
+    return lambda: implied_vol_chain(c["premium"], c["S"], c["K"], c["T"], c["r"], c["kind"])
+
+
+# ---- volatility -----------------------------------------------------------
+
+@case("vol/compute_vol", "returns")
+def _compute_vol(n):
+    returns = hist_vol.compute_returns(synthetic_prices(n + 1))
+    return lambda: hist_vol.compute_vol(returns)
+
+
+@case("vol/rolling_vol", "returns", SIZES[:4])
+def _rolling_vol(n):
+    prices = synthetic_prices(n + 1)
+    return lambda: rolling_vol(prices)
+
+
+# ---- ingestion ------------------------------------------------------------
+
+_csv_dir = None
+
+
+def _csv_path(n):
+    global _csv_dir
+    if _csv_dir is None:
+        _csv_dir = tempfile.mkdtemp(prefix="bench_csv_")
+        atexit.register(shutil.rmtree, _csv_dir, True)
+    return synthetic_csv(n, _csv_dir)
+
+
+@case("ingest/csv_to_list", "rows", SIZES[:4])
+def _csv_to_list(n):
+    path = _csv_path(n)
+    return lambda: hist_vol.csv_to_list(path)
+
+
+@case("ingest/csv_to_lists", "rows", SIZES[:4])
+def _csv_to_lists(n):
+    path = _csv_path(n)
+    return lambda: hist_vol.csv_to_lists(path)
+
+
+@case("ingest/read_columns", "rows", SIZES[:4])
+def _read_columns(n):
+    path = _csv_path(n)
+    return lambda: read_columns(path, ["Close", "Change"], percent=["Change"])
+
+
+# ---- runner ---------------------------------------------------------------
+
+def measure(fn, n, repeat=5, memory=True):
+    """
+    Time fn `repeat` times (one untimed warm-up first) and optionally record its peak
+    traced allocation.
+
+    :return: dict with best/median seconds, throughput per second at the best time, peak bytes
+    """
+    fn()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    out = {"best_s": min(times), "median_s": statistics.median(times), "throughput": n / min(times)}
+    if memory:
+        tracemalloc.start()
+        try:
+            fn()
+            out["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return out
+
+
+def environment():
+    return {
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "scipy": scipy.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "normal_backend": normal.get_backend(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def run(only=None, max_size=10 ** 5, repeat=5, memory=True, verbose=True):
+    """
+    Run every registered case (names starting with `only`, if given) at each of
+    its sizes up to max_size.
+
+    :return: {'environment': ..., 'results': {'name@n': {...}}}
+    """
+    results = {}
+    for name, spec in CASES.items():
+        if only and not any(name.startswith(prefix) for prefix in only):
+            continue
+        for n in spec["sizes"]:
+            if n > max_size:
+                continue
+            fn = spec["setup"](n)
+            row = measure(fn, n, repeat, memory)
+            row.update(name=name, n=n, unit=spec["unit"])
+            results[f"{name}@{n}"] = row
+            if verbose:
+                peak = f"{row['peak_bytes'] / 2 ** 20:9.1f} MiB" if memory else ""
+                print(f"{name:40s} n={n:<9d} {row['best_s'] * 1e3:10.2f} ms "
+                      f"{row['throughput']:14,.0f} {spec['unit']}/s {peak}", flush=True)
+    return {"environment": environment(), "results": results}
+
+
+def compare(baseline, current, threshold=0.10):
+    """
+    Cases whose best time grew by more than `threshold` (relative) against the baseline.
+
+    :param baseline, current: Outputs of run() (or their JSON files' contents)
+    :return:                  List of dicts (key, baseline_s, current_s, change), worst first;
+                              cases present in only one run are skipped
+    """
+    flagged = []
+    for key, row in current["results"].items():
+        base = baseline["results"].get(key)
+        if base is None:
+            continue
+        change = row["best_s"] / base["best_s"] - 1
+        if change > threshold:
+            flagged.append({"key": key, "baseline_s": base["best_s"], "current_s": row["best_s"], "change": change})
+    return sorted(flagged, key=lambda d: -d["change"])
+
+
+def _load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    r = sub.add_parser("run", help="run the benchmarks and optionally save a JSON baseline")
+    r.add_argument("--out")
+    r.add_argument("--only", nargs="*", help="case name prefixes, e.g. price iv/implied_vol_chain")
+    r.add_argument("--max-size", type=float, default=1e5)
+    r.add_argument("--repeat", type=int, default=5)
+    r.add_argument("--no-memory", action="store_true")
+    r.add_argument("--baseline", help="compare against this JSON when done")
+    r.add_argument("--threshold", type=float, default=0.10)
+    c = sub.add_parser("compare", help="flag regressions between two saved runs")
+    c.add_argument("baseline")
+    c.add_argument("current")
+    c.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        current = run(args.only, int(args.max_size), args.repeat, not args.no_memory)
+        if args.out:
+            with open(args.out, "w") as f:
+                json.dump(current, f, indent=2)
+        if not args.baseline:
+            return 0
+        baseline = _load(args.baseline)
+    else:
+        baseline, current = _load(args.baseline), _load(args.current)
+
+    flagged = compare(baseline, current, args.threshold)
+    for row in flagged:
+        print(f"REGRESSION {row['key']:50s} {row['baseline_s'] * 1e3:10.2f} ms -> "
+              f"{row['current_s'] * 1e3:10.2f} ms ({row['change']:+.0%})")
+    if not flagged:
+        print(f"no regressions beyond {args.threshold:.0%}")
+    return 1 if flagged else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
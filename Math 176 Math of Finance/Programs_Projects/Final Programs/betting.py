@@ -0,0 +1,154 @@
+import numpy as np
+import pandas as pd
+
+"""
+
+Batch arbitrage and Kelly sizing for multi-outcome markets.
+
+Odds are fractional (profit per unit staked, as in mathecon and the Arbitrage
+notebook), laid out as an (event x bookmaker x outcome) array with NaN where
+a bookmaker has no price. For every event the best price per outcome is taken,
+and with q_i = 1 / (1 + o_i):
+
+    overround = sum_i q_i            arbitrage iff overround < 1
+    stake_i   = bankroll * q_i / overround
+    profit    = bankroll * (1 / overround - 1)        whatever the result
+
+Working with the sum of implied probabilities avoids the prod(1 + o) terms of
+calculate_optimal_bets, which overflow with many outcomes.
+
+Sample code:
+
+odds = np.array([[[1.1, 2.5, 3.0], [1.3, 2.2, 2.9]]])      # 1 event, 2 books, 3 outcomes
+scan = scan_arbitrage(odds, bankroll=1000)
+scan.is_arb, scan.stakes, scan.profit
+kelly_stakes(p=[[.5, .3, .2]], odds=scan.best_odds, fraction=.5)
+
+"""
+
+
+def implied_probabilities(odds):
+    """
+    q = 1 / (1 + odds), elementwise.
+    """
+    return 1 / (1 + np.asarray(odds, dtype=float))
+
+
+def best_prices(odds):
+    """
+    Best price per (event, outcome) across bookmakers.
+
+    :param odds: (event, bookmaker, outcome) array, NaN for missing prices
+    :return:     (best odds, index of the bookmaker offering it), both (event, outcome);
+                 NaN and -1 where no bookmaker quotes the outcome
+    """
+    odds = np.asarray(odds, dtype=float)
+    filled = np.where(np.isnan(odds), -np.inf, odds)
+    book = np.argmax(filled, axis=1)
+    best = np.take_along_axis(filled, book[:, None, :], axis=1)[:, 0, :]
+    missing = np.isneginf(best)
+    return np.where(missing, np.nan, best), np.where(missing, -1, book)
+
+
+class ArbitrageScan:
+    __slots__ = ("best_odds", "best_book", "overround", "stakes", "profit", "bankroll")
+
+    def __init__(self, best_odds, best_book, overround, stakes, profit, bankroll):
+        self.best_odds = best_odds
+        self.best_book = best_book
+        self.overround = overround
+        self.stakes = stakes
+        self.profit = profit
+        self.bankroll = bankroll
+
+    @property
+    def is_arb(self):
+        return self.overround < 1
+
+    @property
+    def margin(self):
+        """
+        Guaranteed return on the bankroll, 1 / overround - 1.
+        """
+        return self.profit / self.bankroll
+
+    def to_frame(self, only_arbs=True):
+        """
+        One row per event, best margin first.
+        """
+        df = pd.DataFrame({"overround": self.overround, "margin": self.margin, "profit": self.profit})
+        df.index.name = "event"
+        if only_arbs:
+            df = df[self.is_arb]
+        return df.sort_values("margin", ascending=False)
+
+    def __repr__(self):
+        return f"ArbitrageScan(events={self.overround.shape[0]}, arbitrages={int(self.is_arb.sum())})"
+
+
+def scan_arbitrage(odds, bankroll=1.0):
+    """
+    Best prices, overround, equal-payout stakes and guaranteed profit for every event.
+
+    :param odds:     (event, bookmaker, outcome) or (event, outcome) array of fractional odds
+    :param bankroll: Total stake per event (scalar or one per event)
+    :return:         ArbitrageScan; events with an unquoted outcome get NaN
+    """
+    odds = np.asarray(odds, dtype=float)
+    if odds.ndim == 2:
+        odds = odds[:, None, :]
+    best, book = best_prices(odds)
+    q = implied_probabilities(best)
+    overround = q.sum(axis=1)
+    bankroll = np.broadcast_to(np.asarray(bankroll, dtype=float), overround.shape)
+    stakes = bankroll[:, None] * q / overround[:, None]
+    profit = bankroll * (1 / overround - 1)
+    return ArbitrageScan(best, book, overround, stakes, profit, bankroll)
+
+
+def kelly_fractions(p, odds, fraction=1.0):
+    """
+    Kelly bankroll fractions for mutually exclusive outcomes, all events at once.
+
+    Outcomes are admitted in decreasing order of expected return p_i (1 + o_i)
+    while that exceeds the reserve rate R = (1 - sum p) / (1 - sum q) of the
+    outcomes already admitted; admitted outcomes get f_i = p_i - q_i R, the rest
+    nothing (Smoczynski and Tomkins). With one outcome and its complement this
+    is the familiar (p (1 + o) - 1) / o.
+
+    :param p:        (event, outcome) probabilities, each row summing to 1
+    :param odds:     (event, outcome) fractional odds, e.g. ArbitrageScan.best_odds
+    :param fraction: Scale applied to the full-Kelly fractions (0.5 = half Kelly)
+    :return:         (fractions, expected log growth per event at those fractions)
+    """
+    p, odds = np.broadcast_arrays(np.atleast_2d(np.asarray(p, float)), np.atleast_2d(np.asarray(odds, float)))
+    q = implied_probabilities(odds)
+    edge = p * (1 + odds)
+    order = np.argsort(-np.nan_to_num(edge, nan=-np.inf), axis=1, kind="stable")
+    p_s, q_s, e_s = (np.take_along_axis(x, order, axis=1) for x in (p, q, edge))
+
+    cum_p, cum_q = np.cumsum(p_s, axis=1), np.cumsum(q_s, axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        reserve = (1 - cum_p) / (1 - cum_q)
+    previous = np.concatenate([np.ones((p.shape[0], 1)), reserve[:, :-1]], axis=1)
+    # a prefix with sum q >= 1 is an arbitrage, where Kelly is unbounded; stop before it
+    admit = np.logical_and.accumulate((e_s > previous) & (cum_q < 1), axis=1)
+    count = admit.sum(axis=1)
+    rate = np.where(count > 0, np.take_along_axis(reserve, np.maximum(count - 1, 0)[:, None], axis=1)[:, 0], 1.0)
+
+    f_sorted = np.where(admit, np.maximum(p_s - q_s * rate[:, None], 0), 0.0) * fraction
+    f = np.empty_like(f_sorted)
+    np.put_along_axis(f, order, f_sorted, axis=1)
+
+    wealth = 1 - f.sum(axis=1, keepdims=True) + f * (1 + odds)
+    growth = np.nansum(p * np.log(wealth), axis=1)
+    return f, growth
+
+
+def kelly_stakes(p, odds, bankroll=1.0, fraction=1.0):
+    """
+    Kelly stakes in currency: kelly_fractions scaled by each event's bankroll.
+    """
+    f, growth = kelly_fractions(p, odds, fraction)
+    bankroll = np.broadcast_to(np.asarray(bankroll, dtype=float), (f.shape[0],))
+    return f * bankroll[:, None], growth
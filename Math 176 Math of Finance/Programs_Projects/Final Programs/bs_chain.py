@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+import normal
+from instrument import probe
+
+"""
+
+Vectorized Black-Scholes over a whole option chain.
+
+Sample code:
+
+price_chain(100, [90, 100, 110], [.25, .5, 1], .05, [.2, .22, .25], ['call', 'put', 'call'])
+price_chain(df)     # df with columns S, K, T, r, sigma, option_type
+
+"""
+
+GREEKS = ("price", "delta", "gamma", "vega", "theta", "rho")
+
+
+def is_call_mask(kind, n):
+    """
+    Turn option types into a boolean array (True for calls).
+
+    :param kind: 'call'/'put', an array of them, or an array of bools
+    :param n:    Length of the chain
+    :return:     Boolean array of length n
+    """
+    kind = np.asarray(kind)
+    if kind.dtype == bool:
+        return np.broadcast_to(kind, (n,))
+    lowered = np.char.lower(kind.astype(str))
+    calls = lowered == "call"
+    if not np.all(calls | (lowered == "put")):
+        raise ValueError("option_type must be 'call' or 'put'")
+    return np.broadcast_to(calls, (n,))
+
+
+def broadcast_chain(*columns):
+    """
+    Broadcast scalar/array inputs against each other as 1-D float arrays.
+    """
+    return [np.atleast_1d(c) for c in np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in columns))]
+
+
+def d1_d2(S, K, T, r, sigma):
+    """
+    d1, d2 and sigma * sqrt(T) for arrays of contracts.
+    """
+    vol_sqrt_t = sigma * np.sqrt(T)
+    d1 = (np.log(S / K) + (r + 0.5 * sigma ** 2) * T) / vol_sqrt_t
+    return d1, d1 - vol_sqrt_t, vol_sqrt_t
+
+
+def bs_price(S, K, T, r, sigma, is_call):
+    """
+    Black-Scholes price only, for callers that don't need the Greeks
+    (e.g. solver iterations).
+    """
+    d1, d2, _ = d1_d2(S, K, T, r, sigma)
+    disc_K = K * np.exp(-r * T)
+    # call: S N(d1) - K N(d2), put: K N(-d2) - S N(-d1); evaluating N(-d) directly keeps
+    # deep out-of-the-money puts from cancelling to zero, still with two N() calls
+    sign = np.where(is_call, 1.0, -1.0)
+    return sign * (S * normal.cdf(sign * d1) - disc_K * normal.cdf(sign * d2))
+
+
+def bs_vega(S, K, T, r, sigma):
+    """
+    Black-Scholes vega (same for calls and puts).
+    """
+    d1, _, _ = d1_d2(S, K, T, r, sigma)
+    return S * normal.pdf(d1) * np.sqrt(T)
+
+
+@probe
+def price_chain(S, K=None, T=None, r=None, sigma=None, kind="call"):
+    """
+    Price a chain of European options and compute all Greeks in one pass.
+
+    d1, d2, n(d1) and the discount factor are evaluated once and shared between
+    the price and every Greek. Each contract evaluates only N(+-d1), N(+-d2) for
+    its own side; puts take N(-d) directly, as bs_price does, rather than
+    1 - N(d), which cancels to zero deep out of the money.
+
+    :param S:     Spot price(s), or a DataFrame with columns S, K, T, r, sigma
+                  and optionally option_type
+    :param K:     Strike price(s)
+    :param T:     Time(s) to expiration in years
+    :param r:     Risk-free rate(s)
+    :param sigma: Volatility(ies)
+    :param kind:  'call'/'put' or an array of them
+    :return:      Dict of arrays keyed by GREEKS (DataFrame if S was a DataFrame)
+    """
+    frame = None
+    if isinstance(S, pd.DataFrame):
+        frame = S
+        kind = frame["option_type"].to_numpy() if "option_type" in frame else kind
+        S, K, T, r, sigma = (frame[c].to_numpy() for c in ("S", "K", "T", "r", "sigma"))
+
+    S, K, T, r, sigma = broadcast_chain(S, K, T, r, sigma)
+    is_call = is_call_mask(kind, S.shape[0])
+
+    sqrt_t = np.sqrt(T)
+    d1, d2, vol_sqrt_t = d1_d2(S, K, T, r, sigma)
+    sign = np.where(is_call, 1.0, -1.0)
+    N1 = normal.cdf(sign * d1)      # N(d1) for calls, N(-d1) for puts
+    N2 = normal.cdf(sign * d2)
+    nd1 = normal.pdf(d1)
+    disc_K = K * np.exp(-r * T)
+
+    out = {
+        "price": sign * (S * N1 - disc_K * N2),
+        "delta": sign * N1,
+        "gamma": nd1 / (S * vol_sqrt_t),
+        "vega": S * nd1 * sqrt_t,
+        "theta": -S * nd1 * sigma / (2 * sqrt_t) - sign * r * disc_K * N2,
+        "rho": sign * T * disc_K * N2,
+    }
+
+    if frame is not None:
+        return pd.DataFrame(out, index=frame.index)
+    return out
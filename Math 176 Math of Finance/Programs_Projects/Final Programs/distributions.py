@@ -0,0 +1,209 @@
+import numpy as np
+
+"""
+
+Finite discrete distributions on NumPy arrays.
+
+A DiscreteDistribution holds values and probabilities along the last axis.
+1-D arrays are a single distribution; 2-D arrays are a batch of them (one per
+row, padded with zero-probability outcomes if the rows have different sizes),
+and every statistic then comes back as one array over the batch. Values need
+not be unique or sorted.
+
+Sample code:
+
+die = DiscreteDistribution([1, 2, 3, 4, 5, 6])          # uniform
+(die + die).cdf(7), die.quantile(.5), die.moments(4)
+
+bets = DiscreteDistribution.bets(p=[.4, .5, .55], odds=[1.6, 1.0, .9])
+bets.mean(), bets.std(), bets.cdf(0)                   # one entry per bet
+
+"""
+
+
+class DiscreteDistribution:
+    def __init__(self, values, probs=None, tol=1e-4):
+        """
+        :param values: Outcome values, shape (k,) or (batch, k)
+        :param probs:  Matching probabilities; uniform if None
+        :param tol:    Allowed deviation of each row's probability sum from 1
+        """
+        values = np.asarray(values, dtype=float)
+        if probs is None:
+            probs = np.full(values.shape, 1 / values.shape[-1])
+        probs = np.asarray(probs, dtype=float)
+        if values.shape != probs.shape or values.ndim not in (1, 2):
+            raise ValueError("values and probs must have the same 1-D or 2-D shape")
+        if (probs < 0).any():
+            raise ValueError("probabilities must be non-negative")
+        if (np.abs(probs.sum(axis=-1) - 1) > tol).any():
+            raise ValueError("probabilities must sum to 1")
+        self.values = values
+        self.probs = probs
+        self._sorted = None
+
+    @property
+    def batched(self):
+        return self.values.ndim == 2
+
+    def __len__(self):
+        return self.values.shape[0] if self.batched else 1
+
+    def _out(self, x):
+        return x if self.batched else float(x)
+
+    @classmethod
+    def bets(cls, p, odds, stake=1.0):
+        """
+        Batch of win/lose payoffs: +stake*odds with probability p, -stake otherwise.
+        """
+        p, odds, stake = np.broadcast_arrays(*(np.atleast_1d(np.asarray(x, float)) for x in (p, odds, stake)))
+        return cls(np.column_stack([stake * odds, -stake]), np.column_stack([p, 1 - p]))
+
+    def expect(self, f):
+        """
+        E[f(X)] for a vectorized function f.
+        """
+        return self._out((self.probs * f(self.values)).sum(axis=-1))
+
+    def mean(self):
+        return self._out((self.probs * self.values).sum(axis=-1))
+
+    def variance(self):
+        mean = (self.probs * self.values).sum(axis=-1, keepdims=True)
+        return self._out((self.probs * (self.values - mean) ** 2).sum(axis=-1))
+
+    def std(self):
+        return np.sqrt(self.variance())
+
+    def moments(self, order=4, central=False):
+        """
+        Raw (or central) moments 1..order in one pass over a stacked power table.
+
+        :return: Array (..., order) of E[X^j] or E[(X - mean)^j]
+        """
+        x = self.values
+        if central:
+            x = x - (self.probs * x).sum(axis=-1, keepdims=True)
+        powers = x[..., None] ** np.arange(1, order + 1)
+        return (self.probs[..., None] * powers).sum(axis=-2)
+
+    def skewness(self):
+        m = self.moments(3, central=True)
+        return self._out(m[..., 2] / m[..., 1] ** 1.5)
+
+    def kurtosis(self):
+        """
+        Excess kurtosis.
+        """
+        m = self.moments(4, central=True)
+        return self._out(m[..., 3] / m[..., 1] ** 2 - 3)
+
+    def _cumulative(self):
+        if self._sorted is None:
+            order = np.argsort(self.values, axis=-1, kind="stable")
+            values = np.take_along_axis(self.values, order, axis=-1)
+            self._sorted = values, np.cumsum(np.take_along_axis(self.probs, order, axis=-1), axis=-1)
+        return self._sorted
+
+    def cdf(self, x):
+        """
+        P(X <= x). A single distribution takes any array of x; a batch takes a
+        scalar or one x per distribution.
+        """
+        values, cum = self._cumulative()
+        if not self.batched:
+            idx = np.searchsorted(values, x, side="right")
+            out = np.where(idx > 0, cum[np.maximum(idx - 1, 0)], 0.0)
+            return float(out) if np.ndim(x) == 0 else out
+        x = np.broadcast_to(np.asarray(x, float), (values.shape[0],))
+        return (self.probs * (self.values <= x[:, None])).sum(axis=-1)
+
+    def quantile(self, q):
+        """
+        Smallest value v with P(X <= v) >= q, per distribution.
+        """
+        values, cum = self._cumulative()
+        if not self.batched:
+            idx = np.minimum(np.searchsorted(cum, np.asarray(q) - 1e-12), values.shape[0] - 1)
+            out = values[idx]
+            return float(out) if np.ndim(q) == 0 else out
+        q = np.broadcast_to(np.asarray(q, float), (values.shape[0],))
+        idx = np.argmax(cum >= q[:, None] - 1e-12, axis=-1)
+        return values[np.arange(values.shape[0]), idx]
+
+    def simplify(self):
+        """
+        Merge duplicate values and drop zero-probability outcomes (single distributions only).
+        """
+        if self.batched:
+            raise ValueError("simplify works on a single distribution")
+        keep = self.probs > 0
+        values, inverse = np.unique(self.values[keep], return_inverse=True)
+        return DiscreteDistribution(values, np.bincount(inverse, weights=self.probs[keep]))
+
+    def convolve(self, other):
+        """
+        Distribution of X + Y for independent X ~ self, Y ~ other.
+
+        Integer supports on a short range go through np.convolve of dense pmfs;
+        otherwise all value pairs are formed at once. Batches pair row by row.
+        """
+        if not isinstance(other, DiscreteDistribution):
+            return self.shift(other)
+        if not self.batched and not other.batched:
+            dense = self._dense_convolve(other)
+            if dense is not None:
+                return dense
+            values = np.add.outer(self.values, other.values).ravel()
+            probs = np.multiply.outer(self.probs, other.probs).ravel()
+            return DiscreteDistribution(values, probs).simplify()
+        a_v, a_p = np.atleast_2d(self.values), np.atleast_2d(self.probs)
+        b_v, b_p = np.atleast_2d(other.values), np.atleast_2d(other.probs)
+        values = (a_v[:, :, None] + b_v[:, None, :]).reshape(max(len(self), len(other)), -1)
+        probs = (a_p[:, :, None] * b_p[:, None, :]).reshape(values.shape)
+        return DiscreteDistribution(values, probs)
+
+    def _dense_convolve(self, other, max_span=1_000_000):
+        a, b = self.values, other.values
+        if not (np.all(a == np.round(a)) and np.all(b == np.round(b))):
+            return None
+        a_lo, b_lo = int(a.min()), int(b.min())
+        span_a, span_b = int(a.max()) - a_lo + 1, int(b.max()) - b_lo + 1
+        if span_a + span_b > max_span or span_a * span_b <= a.shape[0] * b.shape[0]:
+            return None
+        pa = np.bincount((a - a_lo).astype(np.intp), weights=self.probs, minlength=span_a)
+        pb = np.bincount((b - b_lo).astype(np.intp), weights=other.probs, minlength=span_b)
+        pmf = np.convolve(pa, pb)
+        keep = pmf > 0
+        return DiscreteDistribution((np.arange(pmf.shape[0]) + a_lo + b_lo)[keep], pmf[keep])
+
+    def shift(self, c):
+        return DiscreteDistribution(self.values + c, self.probs)
+
+    def scale(self, c):
+        return DiscreteDistribution(self.values * c, self.probs)
+
+    def __add__(self, other):
+        return self.convolve(other)
+
+    __radd__ = __add__
+
+    def __mul__(self, c):
+        return self.scale(c)
+
+    __rmul__ = __mul__
+
+    def sample(self, size, rng=None):
+        """
+        Draw samples from a single distribution.
+        """
+        if self.batched:
+            raise ValueError("sample works on a single distribution")
+        rng = np.random.default_rng(rng)
+        return rng.choice(self.values, size=size, p=self.probs / self.probs.sum())
+
+    def __repr__(self):
+        if self.batched:
+            return f"DiscreteDistribution(batch={len(self)}, outcomes={self.values.shape[1]})"
+        return f"DiscreteDistribution(mean={self.mean():.6g}, std={self.std():.6g}, outcomes={self.values.shape[0]})"
@@ -0,0 +1,155 @@
+import numpy as np
+import pandas as pd
+import normal
+from bs_chain import bs_price, d1_d2
+from monte_carlo import gbm_paths
+
+"""
+
+Delta-hedging backtests for a short option across paths, rebalancing
+frequencies and transaction costs.
+
+The option is sold at t=0 for `premium` and hedged with the Black-Scholes
+delta, rebalanced every k steps of the path grid. In discounted terms
+(S~ = e^(-rt) S) the self-financing hedge P&L is
+
+    pnl = premium - e^(-rT) payoff(S_T) + sum_j delta_j (S~_(j+1) - S~_j)
+          - cost * sum_j S~_j |delta_j - delta_(j-1)|
+
+over rebalance dates j. The gains term only needs prices on the rebalance
+dates, and the cost term is linear in the cost rate, so each frequency is one
+vectorized pass over the paths and every cost level is a broadcast.
+
+Sample code:
+
+paths = simulate_paths(100, 1, .2, steps=252, n_paths=20_000, mu=.08)
+result = delta_hedge(paths, K=100, T=1, r=.03, sigma=.2, kind='call',
+                     frequencies=[1, 5, 21, 63], costs=[0, .001, .005])
+result.summary()                       # mean, std, quantiles, CVaR per (frequency, cost)
+result.pnl_for(5, .001)                # one P&L distribution
+
+hist = paths_from_series(spy_close, steps=21, S0=100)   # overlapping historical windows
+
+"""
+
+
+def simulate_paths(S, T, sigma, steps, n_paths, mu=0.0, seed=0):
+    """
+    GBM paths for hedging runs (real-world drift mu), reproducible through seed.
+    """
+    return gbm_paths(S, T, sigma, steps, n_paths, mu, np.random.default_rng(seed))
+
+
+def paths_from_series(prices, steps, stride=1, S0=None):
+    """
+    Overlapping windows of `steps + 1` prices cut from one historical series.
+
+    :param stride: Offset between window starts
+    :param S0:     Rescale every window to start at S0 (keeps one strike meaningful)
+    :return:       (windows, steps + 1) array
+    """
+    prices = np.asarray(prices, dtype=float)
+    windows = np.lib.stride_tricks.sliding_window_view(prices, steps + 1)[::stride]
+    if S0 is not None:
+        windows = windows / windows[:, :1] * S0
+    return np.ascontiguousarray(windows)
+
+
+class HedgeResult:
+    __slots__ = ("pnl", "frequencies", "costs", "premium", "steps")
+
+    def __init__(self, pnl, frequencies, costs, premium, steps):
+        self.pnl = pnl
+        self.frequencies = frequencies
+        self.costs = costs
+        self.premium = premium
+        self.steps = steps
+
+    def pnl_for(self, frequency, cost):
+        """
+        P&L across paths for one (frequency, cost) pair.
+        """
+        i = self.frequencies.index(frequency)
+        j = int(np.flatnonzero(np.isclose(self.costs, cost))[0])
+        return self.pnl[i, j]
+
+    def summary(self, quantiles=(0.01, 0.05, 0.5, 0.95), tail=0.05):
+        """
+        Distribution statistics for every (frequency, cost) configuration.
+
+        :param tail: Level of the expected shortfall (mean of the worst `tail` fraction)
+        """
+        pnl = self.pnl
+        q = np.quantile(pnl, quantiles, axis=-1)
+        n_tail = max(int(np.ceil(tail * pnl.shape[-1])), 1)
+        worst = np.partition(pnl, n_tail - 1, axis=-1)[..., :n_tail]
+        index = pd.MultiIndex.from_product([self.frequencies, self.costs], names=["every_steps", "cost"])
+        df = pd.DataFrame({
+            "rebalances": np.repeat([-(-self.steps // k) for k in self.frequencies], len(self.costs)),
+            "mean": pnl.mean(axis=-1).ravel(),
+            "std": pnl.std(axis=-1).ravel(),
+            **{f"q{p:g}": q[i].ravel() for i, p in enumerate(quantiles)},
+            f"cvar{tail:g}": worst.mean(axis=-1).ravel(),
+        }, index=index)
+        return df
+
+    def __repr__(self):
+        return (f"HedgeResult(paths={self.pnl.shape[-1]}, frequencies={self.frequencies}, "
+                f"costs={self.costs.tolist()})")
+
+
+def delta_hedge(paths, K, T, r, sigma, kind="call", frequencies=(1,), costs=(0.0,), premium=None,
+                hedge_sigma=None, liquidate=True):
+    """
+    Hedging P&L (present value, per short option) for every path, rebalancing
+    frequency and proportional cost level.
+
+    :param paths:       (n_paths, steps + 1) prices on an even grid spanning [0, T]
+    :param K, T, r:     Strike, expiry (years) and rate of the short option
+    :param sigma:       Vol used to price the option sold
+    :param kind:        'call' or 'put'
+    :param frequencies: Rebalance every k grid steps, for each k given
+    :param costs:       Proportional costs (fraction of traded notional)
+    :param premium:     Sale price (scalar or per path); Black-Scholes at sigma from each path's S_0 if None
+    :param hedge_sigma: Vol used for the hedge ratios (defaults to sigma)
+    :param liquidate:   Pay costs to unwind the final stock position at T
+    :return:            HedgeResult with pnl of shape (frequencies, costs, paths)
+    """
+    paths = np.asarray(paths, dtype=float)
+    n_paths, steps = paths.shape[0], paths.shape[1] - 1
+    is_call = kind == "call"
+    if kind not in ("call", "put"):
+        raise ValueError("kind must be 'call' or 'put'")
+    hedge_sigma = sigma if hedge_sigma is None else hedge_sigma
+    frequencies = [int(k) for k in frequencies]
+    costs = np.asarray(costs, dtype=float)
+    if premium is None:
+        # per path, since historical windows need not share a starting price
+        premium = bs_price(paths[:, 0], K, T, r, sigma, is_call)
+
+    dt = T / steps
+    times = np.arange(steps + 1) * dt
+    disc_paths = paths * np.exp(-r * times)
+    payoff = np.maximum(paths[:, -1] - K, 0) if is_call else np.maximum(K - paths[:, -1], 0)
+    base = premium - np.exp(-r * T) * payoff
+
+    # deltas only on the union of rebalance dates
+    dates = np.unique(np.concatenate([np.arange(0, steps, k) for k in frequencies]))
+    tau = T - times[dates]
+    d1, _, _ = d1_d2(paths[:, dates], K, tau, r, hedge_sigma)
+    delta_at = normal.cdf(d1) - (0 if is_call else 1)
+    column = np.full(steps + 1, -1)
+    column[dates] = np.arange(dates.shape[0])
+
+    pnl = np.empty((len(frequencies), costs.shape[0], n_paths))
+    for i, k in enumerate(frequencies):
+        rebal = np.arange(0, steps, k)
+        delta = delta_at[:, column[rebal]]
+        ends = np.append(rebal[1:], steps)
+        gains = (delta * (disc_paths[:, ends] - disc_paths[:, rebal])).sum(axis=1)
+        trades = np.abs(np.diff(delta, axis=1, prepend=0.0))
+        traded = (trades * disc_paths[:, rebal]).sum(axis=1)
+        if liquidate:
+            traded += np.abs(delta[:, -1]) * disc_paths[:, -1]
+        pnl[i] = base + gains - costs[:, None] * traded
+    return HedgeResult(pnl, frequencies, costs, premium, steps)
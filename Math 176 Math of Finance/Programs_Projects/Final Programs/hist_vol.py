@@ -1,63 +1,41 @@
-import math
-import csv
 import numpy as np
-from scipy.stats import norm
-from scipy.optimize import newton
+import normal
+from instrument import probe
+from implied_vol import implied_vol_chain
+from ingest import read_columns
+from option_state import CachedInputs
+from realized_vol import RunningVol
 
 def compute_returns(close_prices: list[float]) -> list[float]:
-    returns = []
-    for i in range(1, len(close_prices)):
-        returns.append((close_prices[i] - close_prices[i-1]) / close_prices[i-1])
-    return returns
+    p = np.asarray(close_prices, dtype=float)
+    return (np.diff(p) / p[:-1]).tolist()
 
 
 def compute_mean(returns: list[float], annualized=True):
-    s = 0
-    for r in returns:
-        s += math.log(1 + r)
-    return (252 ** .5) * s / len(returns) if annualized else s / len(returns)
+    m = np.log1p(returns).mean()
+    return (252 ** .5) * m if annualized else m
 
 
 def compute_vol(returns: list[float], annualized=True):
-    mean = compute_mean(returns, False)
-    s = 0
-    for r in returns:
-        s += (math.log(1 + r) - mean) ** 2
-    return (s / (len(returns) - 1)) ** .5 * 252 ** .5 if annualized else (s / (len(returns) - 1)) ** .5
+    rv = RunningVol()
+    rv.add_log_returns(np.log1p(returns))
+    return rv.annualized_vol if annualized else rv.vol
 
 def csv_to_list(rel_filepath, skipfirst=True):
-    start = 0 if skipfirst else 1
-    l = []
-    with open(rel_filepath) as csvfile:
-        reader = csv.reader(csvfile)
-        for row in reader:
-            if "$" in row[1]:
-                l.append(float(row[1][1:]))
-    return l
+    prices = read_columns(rel_filepath, [1], header=False, skiprows=1 if skipfirst else None)[1]
+    return prices[~np.isnan(prices)].tolist()
 
 def csv_to_lists(rel_filepath):
-    l1 = []
-    l2 = []
-    l3 = []
-    with open(rel_filepath) as csvfile:
-        reader = csv.reader(csvfile)
-        for row in reader:
-            l1.append(float(row[0]))
-            l2.append(float(row[1]))
-            l3.append(float(row[2]) / 100)
-    return l1, l2, l3
+    cols = read_columns(rel_filepath, [0, 1, 2], percent=[2], header=False)
+    return cols[0].tolist(), cols[1].tolist(), cols[2].tolist()
 
 def term_csv_to_lists(rel_filepath):
-    T_list = []
-    premium_list = []
-    with open(rel_filepath) as csvfile:
-        reader = csv.reader(csvfile)
-        for row in reader:
-            T_list.append(float(row[3]))
-            premium_list.append(float(row[1]))
-    return T_list, premium_list
+    cols = read_columns(rel_filepath, [1, 3], header=False)
+    return cols[3].tolist(), cols[1].tolist()
+
+class Option(CachedInputs):
+    __slots__ = ("option_type", "premium")
 
-class Option:
     def __init__(self, S, E, T, r, sigma=None, premium=None, option_type='call'):
         """
         Initialize an Option instance.
@@ -78,10 +56,12 @@ class Option:
             option_type : str, default 'call'
                 Type of option: 'call' or 'put'.
         """
+        self._cache = None
         self.S = S
         self.K = E
         self.T = T
         self.r = r
+        self.sigma = None
         self.option_type = option_type.lower()
         
         if sigma is None and premium is None:
@@ -94,82 +74,96 @@ class Option:
         else:
             self.sigma = sigma
             self.premium = premium if premium is not None else self.price()
-    
+
     def d1(self, sigma=None):
         """
         Calculate the d1 term used in the Black-Scholes formulas.
         """
-        sigma = sigma if sigma is not None else self.sigma
+        if sigma is None:
+            return self._state()[0]
         return (np.log(self.S / self.K) + (self.r + 0.5 * sigma ** 2) * self.T) / (sigma * np.sqrt(self.T))
     
     def d2(self, sigma=None):
         """
         Calculate the d2 term used in the Black-Scholes formulas.
         """
-        sigma = sigma if sigma is not None else self.sigma
+        if sigma is None:
+            return self._state()[1]
         return self.d1(sigma) - sigma * np.sqrt(self.T)
     
+    @probe
     def price(self, sigma=None):
         """
         Compute the Black-Scholes price for the option.
         """
-        sigma = sigma if sigma is not None else self.sigma
-        d1 = self.d1(sigma)
-        d2 = self.d2(sigma)
+        if sigma is None:
+            _, _, Nd1, Nd2, N_d1, N_d2, _, _, disc_K = self._state()
+        else:
+            d1 = self.d1(sigma)
+            d2 = d1 - sigma * np.sqrt(self.T)
+            disc_K = self.K * np.exp(-self.r * self.T)
+            if self.option_type == 'put':
+                N_d1, N_d2 = normal.cdf(-d1), normal.cdf(-d2)
+            else:
+                Nd1, Nd2 = normal.cdf(d1), normal.cdf(d2)
         if self.option_type == 'call':
-            return self.S * norm.cdf(d1) - self.K * np.exp(-self.r * self.T) * norm.cdf(d2)
+            return self.S * Nd1 - disc_K * Nd2
         elif self.option_type == 'put':
-            return self.K * np.exp(-self.r * self.T) * norm.cdf(-d2) - self.S * norm.cdf(-d1)
+            return disc_K * N_d2 - self.S * N_d1
         else:
             raise ValueError("Invalid option type. Use 'call' or 'put'.")
     
+    @probe
     def delta(self):
         """
         Calculate and return the option's delta.
         """
-        d1 = self.d1()
+        Nd1 = self._state()[2]
         if self.option_type == 'call':
-            return norm.cdf(d1)
+            return Nd1
         elif self.option_type == 'put':
-            return norm.cdf(d1) - 1
+            return Nd1 - 1
     
+    @probe
     def gamma(self):
         """
         Calculate and return the option's gamma.
         """
-        d1 = self.d1()
-        return norm.pdf(d1) / (self.S * self.sigma * np.sqrt(self.T))
+        _, _, _, _, _, _, nd1, sqrt_t, _ = self._state()
+        return nd1 / (self.S * self.sigma * sqrt_t)
     
+    @probe
     def theta(self):
         """
         Calculate and return the option's theta.
         """
-        d1 = self.d1()
-        d2 = self.d2()
-        term1 = - (self.S * norm.pdf(d1) * self.sigma) / (2 * np.sqrt(self.T))
+        _, _, _, Nd2, _, N_d2, nd1, sqrt_t, disc_K = self._state()
+        term1 = - (self.S * nd1 * self.sigma) / (2 * sqrt_t)
         if self.option_type == 'call':
-            term2 = - self.r * self.K * np.exp(-self.r * self.T) * norm.cdf(d2)
+            term2 = - self.r * disc_K * Nd2
             return term1 + term2
         elif self.option_type == 'put':
-            term2 = self.r * self.K * np.exp(-self.r * self.T) * norm.cdf(-d2)
+            term2 = self.r * disc_K * N_d2
             return term1 + term2
     
+    @probe
     def vega(self):
         """
         Calculate and return the option's vega.
         """
-        d1 = self.d1()
-        return self.S * norm.pdf(d1) * np.sqrt(self.T)
+        _, _, _, _, _, _, nd1, sqrt_t, _ = self._state()
+        return self.S * nd1 * sqrt_t
     
+    @probe
     def rho(self):
         """
         Calculate and return the option's rho.
         """
-        d2 = self.d2()
+        _, _, _, Nd2, _, N_d2, _, _, disc_K = self._state()
         if self.option_type == 'call':
-            return self.T * self.K * np.exp(-self.r * self.T) * norm.cdf(d2)
+            return self.T * disc_K * Nd2
         elif self.option_type == 'put':
-            return -self.T * self.K * np.exp(-self.r * self.T) * norm.cdf(-d2)
+            return -self.T * disc_K * N_d2
     
     def implied_volatility_objective(self, sigma, market_price):
         """
@@ -177,9 +171,14 @@ class Option:
         """
         return self.price(sigma) - market_price
     
+    @probe
     def implied_volatility(self, market_price):
         """
-        Calculate the implied volatility given a market price using the Newton-Raphson method.
+        Calculate the implied volatility given a market price.
+
+        Uses the batch solver (rational initial guess, Newton with analytic vega
+        safeguarded by bisection); returns NaN if the price violates the
+        no-arbitrage bounds.
         """
-        sigma_initial_guess = 0.2
-        return newton(self.implied_volatility_objective, sigma_initial_guess, args=(market_price,))
+        sigma, _ = implied_vol_chain(market_price, self.S, self.K, self.T, self.r, self.option_type)
+        return float(sigma[0])
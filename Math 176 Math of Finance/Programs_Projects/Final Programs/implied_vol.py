@@ -0,0 +1,140 @@
+import numpy as np
+import instrument
+from bs_chain import broadcast_chain, bs_price, bs_vega, is_call_mask
+
+"""
+
+Batch implied volatility for whole chains.
+
+Sample code:
+
+sigma, converged = implied_vol_chain([11.24, 6.58], 100, [95, 105], .5, .01, 'call')
+
+"""
+
+SIGMA_MIN = 1e-6
+SIGMA_MAX = 5.0
+
+
+def initial_guess(call_price, S, disc_K, T):
+    """
+    Corrado-Miller rational guess for call implied vol, falling back to
+    Brenner-Subrahmanyam (exact at the money) where the square root goes negative.
+
+    :param call_price: Call premiums (puts converted through parity)
+    :param S:          Spot prices
+    :param disc_K:     Discounted strikes K * exp(-rT)
+    :param T:          Times to expiration
+    """
+    half_moneyness = (S - disc_K) / 2
+    excess = call_price - half_moneyness
+    root = excess ** 2 - (S - disc_K) ** 2 / np.pi
+    corrado = np.sqrt(2 * np.pi / T) / (S + disc_K) * (excess + np.sqrt(np.maximum(root, 0)))
+    brenner = np.sqrt(2 * np.pi / T) * call_price / S
+    return np.where(root > 0, corrado, brenner)
+
+
+@instrument.probe
+def implied_vol_chain(premium, S, K, T, r, kind="call", tol=1e-8, max_iter=100):
+    """
+    Implied volatility for arrays of quotes with safeguarded Newton.
+
+    Every quote starts from a rational initial guess and is kept inside a
+    [lo, hi] bracket that shrinks each iteration. A Newton step (analytic vega)
+    is taken when it lands inside the bracket, otherwise the step bisects.
+    Quotes drop out of the working set as soon as they converge, so one
+    iteration only prices the ones still moving.
+
+    Quotes outside the no-arbitrage bounds
+        call: max(S - K e^(-rT), 0) < C < S
+        put:  max(K e^(-rT) - S, 0) < P < K e^(-rT)
+    get NaN and are never iterated. Every quote is priced as its own kind, so
+    far out-of-the-money puts are not lost to parity cancellation, and the
+    price test is relative to the time value, so wing quotes worth fractions
+    of a cent still iterate. A quote whose vol ends on the SIGMA_MIN clip, or
+    whose time value is lost in the rounding of its premium, is returned with
+    converged False.
+
+    :param premium:  Market prices of the options
+    :param S:        Spot price(s)
+    :param K:        Strike price(s)
+    :param T:        Time(s) to expiration in years
+    :param r:        Risk-free rate(s)
+    :param kind:     'call'/'put' or an array of them
+    :param tol:      Relative tolerance on the price (|model - premium| < tol * time value)
+                     and on the vol bracket (hi - lo < tol * hi)
+    :param max_iter: Iteration cap
+    :return:         (sigma, converged) arrays; sigma is NaN where no solution exists
+    """
+    premium, S, K, T, r = broadcast_chain(premium, S, K, T, r)
+    n = premium.shape[0]
+    is_call = is_call_mask(kind, n)
+
+    disc_K = K * np.exp(-r * T)
+    lower = np.where(is_call, np.maximum(S - disc_K, 0), np.maximum(disc_K - S, 0))
+    upper = np.where(is_call, S, disc_K)
+    valid = (premium > lower) & (premium < upper) & (T > 0)
+
+    sigma = np.full(n, np.nan)
+    converged = np.zeros(n, dtype=bool)
+
+    idx = np.flatnonzero(valid)
+    S_a, K_a, T_a, r_a, p_a, call_a = S[idx], K[idx], T[idx], r[idx], premium[idx], is_call[idx]
+    # vol only moves the time value, so that is what the price test is relative to
+    scale = premium[idx] - lower[idx]
+    # a time value near rounding of the premium (deep in the money) does not pin the vol down
+    resolvable = scale > 1e3 * np.finfo(float).eps * premium[idx]
+    lo = np.full(idx.shape[0], SIGMA_MIN)
+    hi = np.full(idx.shape[0], SIGMA_MAX)
+
+    # widen the upper bracket for extreme quotes
+    for _ in range(10):
+        short = bs_price(S_a, K_a, T_a, r_a, hi, call_a) < p_a
+        if not short.any():
+            break
+        hi[short] *= 2
+
+    # the rational guess is written for calls: C = P + S - K e^(-rT)
+    c_a = np.where(call_a, p_a, p_a + S_a - disc_K[idx])
+    guess = initial_guess(c_a, S_a, disc_K[idx], T_a)
+    guess = np.where(np.isfinite(guess), guess, 0.5 * (lo + hi))
+    sig = np.clip(guess, lo, hi)
+
+    passes = work = 0
+    for _ in range(max_iter):
+        if idx.shape[0] == 0:
+            break
+        passes += 1
+        work += idx.shape[0]
+        diff = bs_price(S_a, K_a, T_a, r_a, sig, call_a) - p_a
+        done = (np.abs(diff) < tol * scale) | (hi - lo < tol * hi)
+        if done.any():
+            sigma[idx[done]] = sig[done]
+            converged[idx[done]] = (sig[done] > SIGMA_MIN) & resolvable[done]
+            keep = ~done
+            idx, S_a, K_a, T_a, r_a, p_a, call_a, scale, resolvable = (
+                x[keep] for x in (idx, S_a, K_a, T_a, r_a, p_a, call_a, scale, resolvable))
+            lo, hi, sig, diff = lo[keep], hi[keep], sig[keep], diff[keep]
+            if idx.shape[0] == 0:
+                break
+
+        # price is increasing in sigma, so the sign of diff tells which side the root is on
+        over = diff > 0
+        hi = np.where(over, sig, hi)
+        lo = np.where(over, lo, sig)
+
+        vega = bs_vega(S_a, K_a, T_a, r_a, sig)
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            newton = sig - diff / vega
+        inside = np.isfinite(newton) & (newton > lo) & (newton < hi)
+        sig = np.where(inside, newton, 0.5 * (lo + hi))
+
+    # best estimate for anything that ran out of iterations
+    sigma[idx] = sig
+    if instrument.enabled():
+        n_valid = int(valid.sum())
+        failures = [{"S": s, "K": k, "T": t, "r": rr, "premium": c, "call": cp}
+                    for s, k, t, rr, c, cp in zip(*(x[:10].tolist() for x in (S_a, K_a, T_a, r_a, p_a, call_a)))]
+        instrument.record_solver("implied_vol.implied_vol_chain", n_valid, work, passes,
+                                 nonconverged=idx.shape[0], invalid=n - n_valid, failures=failures)
+    return sigma, converged
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+
+"""
+
+CSV ingestion straight into typed NumPy columns.
+
+Sample code:
+
+cols = read_columns('quotes.csv', ['Close', 'IV'], percent=['IV'])
+cols['Close']                                     # float64 array, "$" already stripped
+
+rv = RunningVol()
+for chunk in iter_columns('ticks.csv', ['price'], chunksize=1_000_000):
+    rv.update_many(chunk['price'])                # file never fully in memory
+
+"""
+
+# characters removed from text columns before converting to float
+_STRIP = r"[$,\s%]"
+
+
+def _clean(series: pd.Series, percent: bool) -> np.ndarray:
+    """
+    Convert one parsed column to float64. Text columns have currency signs,
+    thousands separators and '%' removed; values that still don't parse become
+    NaN. Percent columns (or values written with '%') are divided by 100.
+    """
+    if series.dtype.kind in "fiu":
+        values = series.to_numpy(dtype=float)
+        return values / 100 if percent else values
+    text = series.astype(str)
+    values = pd.to_numeric(text.str.replace(_STRIP, "", regex=True), errors="coerce").to_numpy(dtype=float)
+    if percent:
+        return values / 100
+    has_pct = text.str.endswith("%").to_numpy()
+    return np.where(has_pct, values / 100, values) if has_pct.any() else values
+
+
+def _reader_args(columns, header, skiprows, chunksize):
+    return dict(
+        header=0 if header else None,
+        usecols=list(columns) if columns is not None else None,
+        skiprows=skiprows,
+        chunksize=chunksize,
+        skipinitialspace=True,
+    )
+
+
+def _to_arrays(frame, columns, percent):
+    if columns is None:
+        return {k: _clean(frame[k], k in percent) for k in frame.columns}
+    keys = list(columns)
+    if all(k in frame.columns for k in keys):
+        return {k: _clean(frame[k], k in percent) for k in keys}
+    # integer positions on a file with a header: pandas keeps the selected columns in file order
+    order = sorted(keys)
+    return {k: _clean(frame.iloc[:, order.index(k)], k in percent) for k in keys}
+
+
+def iter_columns(path, columns=None, percent=(), header=True, skiprows=None, chunksize=500_000):
+    """
+    Stream a CSV as successive dicts of float64 arrays, `chunksize` rows at a time.
+
+    :param path:      File path
+    :param columns:   Column names (header=True) or 0-based indices; None for all
+    :param percent:   Columns holding percentages, divided by 100
+    :param header:    Whether the first row holds column names
+    :param skiprows:  Rows to skip before parsing (int or list, as in pandas)
+    :param chunksize: Rows per chunk
+    :return:          Generator of {column: np.ndarray}
+    """
+    percent = set(percent)
+    with pd.read_csv(path, **_reader_args(columns, header, skiprows, chunksize)) as reader:
+        for frame in reader:
+            yield _to_arrays(frame, columns, percent)
+
+
+def read_columns(path, columns=None, percent=(), header=True, skiprows=None):
+    """
+    Load selected CSV columns as float64 arrays in one go. Same arguments as
+    iter_columns, without chunking.
+
+    :return: {column: np.ndarray}
+    """
+    frame = pd.read_csv(path, **_reader_args(columns, header, skiprows, None))
+    return _to_arrays(frame, columns, set(percent))
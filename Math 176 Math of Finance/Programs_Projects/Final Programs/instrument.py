@@ -0,0 +1,306 @@
+import cProfile
+import functools
+import math
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import deque
+
+"""
+
+Opt-in instrumentation for the pricing layer.
+
+Pricing, Greek and IV entry points are registered with @probe, which returns
+the function unchanged, so while instrumentation is off (the default) there is
+no wrapper at all. enable() (or the instrumented() context, or
+FINANCE_INSTRUMENT=1 in the environment) swaps a timing wrapper in wherever the
+function is bound, including names imported into other modules (OptionBook,
+ScenarioEngine, hedging, ...), and disable() swaps the originals back in the
+same places. Wrappers record call counts and latency into a
+log-bucketed histogram (8 buckets per power of two, so percentiles are within
+about 6%). The solvers also report iteration counts and quotes that failed to
+converge, behind a single enabled() check per batch.
+
+Sample code:
+
+enable()
+chain = price_chain(S, K, T, r, sigma)
+iv, ok = implied_vol_chain(premium, S, K, T, r)
+snapshot()['calls']['bs_chain.price_chain']['p99']
+print(to_prometheus())
+profile_calls(o.implied_volatility, 10.45)      # where the time goes inside one call
+
+"""
+
+_enabled = os.environ.get("FINANCE_INSTRUMENT", "").lower() in ("1", "true", "yes", "on")
+_lock = threading.Lock()
+_calls = {}
+_solvers = {}
+SUB_BUCKETS = 8
+MAX_FAILURE_SAMPLES = 100
+
+
+class _Latency:
+    __slots__ = ("count", "total", "min", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self.buckets = {}
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        m, e = math.frexp(seconds)
+        key = e * SUB_BUCKETS + int((m - 0.5) * 2 * SUB_BUCKETS)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+
+    def percentile(self, q):
+        """
+        Upper edge of the bucket holding the q-quantile, capped at the observed max.
+        """
+        if self.count == 0:
+            return math.nan
+        rank = q * self.count
+        seen = 0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen >= rank:
+                e, sub = divmod(key, SUB_BUCKETS)
+                return min(math.ldexp(0.5 + (sub + 1) / (2 * SUB_BUCKETS), e), self.max)
+        return self.max
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "total_s": self.total,
+            "mean_s": self.total / self.count if self.count else math.nan,
+            "min_s": self.min if self.count else math.nan,
+            "max_s": self.max,
+            "p50": self.percentile(0.5),
+            "p90": self.percentile(0.9),
+            "p99": self.percentile(0.99),
+        }
+
+
+class _Solver:
+    __slots__ = ("solves", "iterations", "max_iterations", "nonconverged", "invalid", "failures")
+
+    def __init__(self):
+        self.solves = 0
+        self.iterations = 0
+        self.max_iterations = 0
+        self.nonconverged = 0
+        self.invalid = 0
+        self.failures = deque(maxlen=MAX_FAILURE_SAMPLES)
+
+    def as_dict(self):
+        return {
+            "solves": self.solves,
+            "iterations": self.iterations,
+            "mean_iterations": self.iterations / self.solves if self.solves else math.nan,
+            "max_iterations": self.max_iterations,
+            "nonconverged": self.nonconverged,
+            "invalid": self.invalid,
+            "recent_failures": list(self.failures),
+        }
+
+
+def enable():
+    """
+    Swap the timing wrappers in. References taken before this call (a stored
+    bound method such as f = o.price) keep calling the original.
+    """
+    global _enabled, _modules_at_enable
+    if not _enabled:
+        _enabled = True
+        _modules_at_enable = set(sys.modules)
+        _bound[:] = _swap(_probes, list(sys.modules))
+
+
+def disable():
+    """
+    Put the originals back everywhere enable() rebound them, and in modules
+    imported since (which picked up the wrappers at import time).
+    """
+    global _enabled
+    if _enabled:
+        _enabled = False
+        for owner, attr, original, wrapper in _bound:
+            if getattr(owner, attr, None) is wrapper:
+                setattr(owner, attr, original)
+        _bound.clear()
+        since = set(sys.modules) - _modules_at_enable
+        _swap({wrapper: fn for fn, wrapper in _probes.items()}, since | _probe_modules)
+
+
+def enabled():
+    return _enabled
+
+
+class instrumented:
+    """
+    Context manager that turns instrumentation on and restores the previous state.
+    """
+
+    def __enter__(self):
+        self._previous = _enabled
+        enable()
+        return self
+
+    def __exit__(self, *exc):
+        if not self._previous:
+            disable()
+
+
+def reset():
+    with _lock:
+        _calls.clear()
+        _solvers.clear()
+
+
+_probes = {}      # original function -> timing wrapper
+_probe_modules = set()      # names of the modules that registered probes
+_bound = []       # (owner, attribute, original, wrapper) rebound by enable()
+_modules_at_enable = set()
+
+
+def _swap(replace, module_names):
+    """
+    Rebind every global and class attribute of the named modules that `is` a
+    key of `replace` to the mapped object.
+
+    :return: (owner, attribute, old, new) for every rebinding made
+    """
+    by_id = {id(old): (old, new) for old, new in replace.items()}
+    done = []
+    for name in module_names:
+        module = sys.modules.get(name)
+        namespace = getattr(module, "__dict__", None)
+        if namespace is None:
+            continue
+        for key, value in list(namespace.items()):
+            pair = by_id.get(id(value))
+            if pair is not None and value is pair[0]:
+                setattr(module, key, pair[1])
+                done.append((module, key) + pair)
+            elif isinstance(value, type) and value.__module__ == name:
+                for attr, member in list(vars(value).items()):
+                    pair = by_id.get(id(member))
+                    if pair is not None and member is pair[0]:
+                        setattr(value, attr, pair[1])
+                        done.append((value, attr) + pair)
+    return done
+
+
+def _timed(fn, name):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            with _lock:
+                stats = _calls.get(name)
+                if stats is None:
+                    stats = _calls[name] = _Latency()
+                stats.observe(elapsed)
+
+    return wrapper
+
+
+def probe(fn):
+    """
+    Register fn as an entry point recorded under "<module>.<qualname>".
+
+    Returns fn itself (or its wrapper if instrumentation is already on), so an
+    uninstrumented process calls the original function directly.
+    """
+    wrapper = _timed(fn, f"{fn.__module__}.{fn.__qualname__}")
+    _probes[fn] = wrapper
+    _probe_modules.add(fn.__module__)
+    return wrapper if _enabled else fn
+
+
+def record_solver(name, solves, iterations, max_iterations=None, nonconverged=0, invalid=0, failures=()):
+    """
+    Add one batch of solves to a solver's counters. Callers check enabled() first.
+
+    :param solves:         Number of problems solved in the batch
+    :param iterations:     Total iterations spent across them
+    :param max_iterations: Largest iteration count of any single solve
+    :param nonconverged:   Solves that hit the iteration cap
+    :param invalid:        Inputs rejected without iterating (e.g. arbitrage-violating quotes)
+    :param failures:       Inputs of non-converged solves, kept in a bounded recent list
+    """
+    with _lock:
+        s = _solvers.get(name)
+        if s is None:
+            s = _solvers[name] = _Solver()
+        s.solves += solves
+        s.iterations += iterations
+        s.max_iterations = max(s.max_iterations, iterations if max_iterations is None else max_iterations)
+        s.nonconverged += nonconverged
+        s.invalid += invalid
+        s.failures.extend(failures)
+
+
+def snapshot():
+    """
+    All counters as plain dicts: {'enabled', 'calls': {name: ...}, 'solvers': {name: ...}}.
+    """
+    with _lock:
+        return {
+            "enabled": _enabled,
+            "calls": {k: v.as_dict() for k, v in sorted(_calls.items())},
+            "solvers": {k: v.as_dict() for k, v in sorted(_solvers.items())},
+        }
+
+
+def to_prometheus(prefix="finance"):
+    """
+    Prometheus text exposition of the current counters.
+    """
+    snap = snapshot()
+    lines = [f"# HELP {prefix}_call_seconds Latency of instrumented pricing entry points",
+             f"# TYPE {prefix}_call_seconds summary"]
+    for name, c in snap["calls"].items():
+        for q in ("p50", "p90", "p99"):
+            lines.append(f'{prefix}_call_seconds{{fn="{name}",quantile="0.{q[1:]}"}} {c[q]:.9g}')
+        lines.append(f'{prefix}_call_seconds_sum{{fn="{name}"}} {c["total_s"]:.9g}')
+        lines.append(f'{prefix}_call_seconds_count{{fn="{name}"}} {c["count"]}')
+    for metric, key, text in (("solves", "solves", "Problems solved"),
+                              ("iterations", "iterations", "Solver iterations"),
+                              ("nonconverged", "nonconverged", "Solves that hit the iteration cap"),
+                              ("invalid", "invalid", "Inputs rejected without iterating")):
+        lines.append(f"# HELP {prefix}_solver_{metric}_total {text}")
+        lines.append(f"# TYPE {prefix}_solver_{metric}_total counter")
+        for name, s in snap["solvers"].items():
+            lines.append(f'{prefix}_solver_{metric}_total{{solver="{name}"}} {s[key]}')
+    return "\n".join(lines) + "\n"
+
+
+def profile_calls(fn, *args, top=15, **kwargs):
+    """
+    Run fn once under cProfile and return the heaviest functions by own time,
+    e.g. to see how much of Option.implied_volatility is normal.cdf versus
+    Python overhead.
+
+    :return: (result of fn, list of dicts with function, calls, own_s, cumulative_s)
+    """
+    profiler = cProfile.Profile()
+    result = profiler.runcall(fn, *args, **kwargs)
+    stats = pstats.Stats(profiler)
+    rows = []
+    for (file, line, func), (_, calls, own, cumulative, _) in stats.stats.items():
+        rows.append({"function": f"{os.path.basename(file)}:{line}({func})", "calls": calls,
+                     "own_s": own, "cumulative_s": cumulative})
+    rows.sort(key=lambda d: -d["own_s"])
+    return result, rows[:top]
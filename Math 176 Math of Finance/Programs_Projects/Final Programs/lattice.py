@@ -0,0 +1,155 @@
+import numpy as np
+from bs_chain import broadcast_chain, d1_d2, is_call_mask
+from instrument import probe
+
+"""
+
+Binomial lattice pricing for American (and European) options.
+
+Each contract's backward induction reuses one column of a (steps+1 x contracts)
+buffer in place, so memory is O(steps) per contract and every step is a single
+vectorized update across all contracts.
+
+Sample code:
+
+lattice_price(100, [90, 100, 110], 1, .05, .2, 'put', steps=201, method='lr')
+lattice_price(100, 100, 1, .05, .2, 'put', greeks=True)
+price_american(Option(100, 100, 1, .05, .2, option_type='put'), richardson=True)
+
+"""
+
+
+def _peizer_pratt(z, n):
+    """
+    Peizer-Pratt method 2 inversion of the normal CDF onto n binomial steps.
+    """
+    return 0.5 + np.sign(z) * 0.5 * np.sqrt(1 - np.exp(-(z / (n + 1 / 3 + 0.1 / (n + 1))) ** 2 * (n + 1 / 6)))
+
+
+def _tree_parameters(S, K, T, r, sigma, steps, method):
+    """
+    Per-contract up/down factors and risk-neutral up probability.
+    """
+    dt = T / steps
+    growth = np.exp(r * dt)
+    if method == "crr":
+        u = np.exp(sigma * np.sqrt(dt))
+        d = 1 / u
+        p = (growth - d) / (u - d)
+    elif method == "lr":
+        d1, d2, _ = d1_d2(S, K, T, r, sigma)
+        p = _peizer_pratt(d2, steps)
+        p_star = _peizer_pratt(d1, steps)
+        u = growth * p_star / p
+        d = (growth - p * u) / (1 - p)
+    else:
+        raise ValueError("method must be 'crr' or 'lr'")
+    return u, d, p, dt
+
+
+def _induct(S, K, T, r, sigma, is_call, steps, method, american):
+    """
+    Backward induction over all contracts at once.
+
+    The buffer is laid out (node, contract) so each step works on a contiguous
+    leading block of rows.
+
+    :return: (price, greeks dict) with delta, gamma, theta read off the first two steps
+    """
+    u, d, p, dt = _tree_parameters(S, K, T, r, sigma, steps, method)
+    disc = np.exp(-r * dt)
+    sign = np.where(is_call, 1.0, -1.0)
+    ratio = u / d
+
+    def spot_at(j):
+        # node i of step j has i up moves: S * d^j * (u/d)^i
+        return S * d ** j * ratio ** np.arange(j + 1)[:, None]
+
+    spot = spot_at(steps)
+    values = np.maximum(sign * (spot - K), 0)
+    pu, pd = disc * p, disc * (1 - p)
+    inv_d = 1 / d
+    scratch = np.empty_like(values)
+
+    saved = {steps: (values.copy(), spot.copy())} if steps <= 2 else {}
+    for j in range(steps - 1, -1, -1):
+        v, up, tmp = values[:j + 1], values[1:j + 2], scratch[:j + 1]
+        np.multiply(up, pu, out=tmp)
+        v *= pd
+        v += tmp
+        if american:
+            # stepping back one level divides every node by d
+            spot_j = spot[:j + 1]
+            spot_j *= inv_d
+            np.subtract(spot_j, K, out=tmp)
+            tmp *= sign
+            np.maximum(v, tmp, out=v)
+        if j <= 2:
+            saved[j] = (v.copy(), spot_at(j))
+
+    v1, s1 = saved[1]
+    delta = (v1[1] - v1[0]) / (s1[1] - s1[0])
+    if steps >= 2:
+        v2, s2 = saved[2]
+        delta_up = (v2[2] - v2[1]) / (s2[2] - s2[1])
+        delta_down = (v2[1] - v2[0]) / (s2[1] - s2[0])
+        gamma = (delta_up - delta_down) / (0.5 * (s2[2] - s2[0]))
+        # the middle node sits at S*u*d, which is S only for CRR; shift its value back
+        # to S along the quadratic through the three step-2 nodes before differencing in time
+        offset = S - s2[1]
+        at_spot = v2[1] + offset * (delta_up * (s2[1] - s2[0]) + delta_down * (s2[2] - s2[1])) / (s2[2] - s2[0]) \
+            + 0.5 * gamma * offset ** 2
+        theta = (at_spot - values[0]) / (2 * dt)
+    else:
+        gamma = theta = np.full(S.shape, np.nan)
+    return values[0].copy(), {"delta": delta, "gamma": gamma, "theta": theta}
+
+
+@probe
+def lattice_price(S, K, T, r, sigma, kind="put", american=True, steps=200, method="crr", richardson=False,
+                  greeks=False):
+    """
+    Binomial price for arrays of contracts.
+
+    :param S, K, T, r, sigma: Black-Scholes inputs, broadcast against each other
+    :param kind:       'call'/'put' or an array of them
+    :param american:   Allow early exercise at every node
+    :param steps:      Tree steps (Leisen-Reimer rounds up to an odd count)
+    :param method:     'crr' (Cox-Ross-Rubinstein) or 'lr' (Leisen-Reimer)
+    :param richardson: Combine the `steps` tree with one of about twice as many steps and
+                       the same parity, cancelling the leading error term (order 2 for
+                       European LR, order 1 otherwise)
+    :param greeks:     Also return delta, gamma, theta from the lattice (the finer
+                       tree's when extrapolating)
+    :return:           Price array, or dict with price/delta/gamma/theta if greeks
+    """
+    S, K, T, r, sigma = broadcast_chain(S, K, T, r, sigma)
+    is_call = is_call_mask(kind, S.shape[0])
+    if method == "lr" and steps % 2 == 0:
+        steps += 1
+
+    price, g = _induct(S, K, T, r, sigma, is_call, steps, method, american)
+    if richardson:
+        # keep the fine tree at the same parity: CRR prices oscillate between odd and even
+        # step counts, and LR needs odd ones, so the steps don't always exactly double
+        fine_steps = 2 * steps + steps % 2
+        fine, g_fine = _induct(S, K, T, r, sigma, is_call, fine_steps, method, american)
+        # error ~ c / N^order, with order 2 only for European LR
+        order = 2 if method == "lr" and not american else 1
+        w = (fine_steps / steps) ** order
+        price = (w * fine - price) / (w - 1)
+        g = g_fine
+
+    if greeks:
+        return {"price": price, **g}
+    return price
+
+
+def price_american(o, steps=200, method="crr", richardson=False, greeks=False):
+    """
+    American price of an Option through lattice_price.
+    """
+    out = lattice_price(o.S, o.K, o.T, o.r, o.sigma, o.option_type, True, steps, method, richardson, greeks)
+    if greeks:
+        return {k: float(v[0]) for k, v in out.items()}
+    return float(out[0])
@@ -1,6 +1,8 @@
 import math
 import numpy as np
 from scipy.stats import norm
+from combinatorics import factorial, score_tail_counts
+from distributions import DiscreteDistribution
 
 def calculate_optimal_bets(odds, total_money):
 
@@ -13,8 +15,9 @@ def calculate_optimal_bets(odds, total_money):
     # Calculate optimal bets for each outcome
     optimal_bets = total_money / denominator * (1 / (1 + odds))
 
-    # Calculate the guaranteed profit
-    profit = total_money * (np.prod(1 + odds) / np.sum(np.prod(1 + odds) / (1 + odds)) - 1)
+    # Calculate the guaranteed profit (every outcome pays total_money / denominator;
+    # the old prod(1 + odds) form of the same ratio overflowed for many outcomes)
+    profit = total_money * (1 / denominator - 1)
 
     return optimal_bets, profit
 
@@ -26,21 +29,10 @@ def odds_to_p(odds):
 
 # calculate expected value for finite list of events
 def expected_value(prob_list, value_list):
-    p_sum = 0
-    v_sum = 0
-    for i in range(len(prob_list)):
-        p_sum += prob_list[i]
-        v_sum += prob_list[i] * value_list[i]
-    if abs(p_sum - 1) > .0001:
-        raise ValueError
-    else:
-        return v_sum
-    
+    return DiscreteDistribution(value_list, prob_list).mean()
+
 def variance(prob_list, value_list):
-    v2_sum = 0
-    for i in range(len(prob_list)):
-        v2_sum += prob_list[i] * value_list[i] ** 2
-    return v2_sum - expected_value(prob_list, value_list) ** 2
+    return DiscreteDistribution(value_list, prob_list).variance()
 
 def find_p(s, c, E, r, t):
     return c + E * math.e ** (-r * t)  - s
@@ -61,12 +53,7 @@ def find_t(s, p, c, E, r):
     return math.log((s + p - c) / E) / -r
 
 def fact(x):
-    if x == 0:
-        return 1
-    p = 1
-    for i in range(1, x+1):
-        p *= i
-    return p
+    return factorial(x)
 
 def derivative(x, y):
     return (-1) **  (x // 2) * ((-1)** x + 1) / 2
@@ -78,12 +65,7 @@ def taylor(x, n, deriv=derivative):
     return s
 
 def c(n, k):
-    p = 1
-    for i in range(n - k + 1, n + 1):
-        p *= i
-    for i in range(1, k + 1):
-        p //= i
-    return p
+    return math.comb(n, k)
 
 # probability that variable with 
 #   mean = mu
@@ -102,15 +84,9 @@ def clt_avg(mu, sigma, n, x):
     return norm.cdf(x, loc=mu, scale=sigma / (n ** .5))
 
 # hw specific
+# 100 trials scoring 4 (x of them), 5 (y) or 0, counting c(100, x) * c(100 - x, y)
+# arrangements per (x, y); P(4x + 5y >= 310) without looping over (x, y)
 def e6():
-    good = 0
-    total = 0
-    for x in range(0, 101):
-        for y in range(0, 101 - x):
-            pos = c(100, x) * c(100 - x, y)
-            if (4 * x + 5 * y >= 310):
-                good += pos
-            total += pos
-    return (good, total)
+    return score_tail_counts(100, scores=(4, 5, 0), threshold=310)
 # returns (171790031178624005677722517960457649367012027599,
 #   515377520732011331036461129765621272702107522001)
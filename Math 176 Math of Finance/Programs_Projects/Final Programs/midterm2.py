@@ -1,9 +1,16 @@
 import math
 import numpy as np
-from scipy.stats import norm
+import normal
+from instrument import probe
+from option_state import CachedInputs
+from solvers import find_inverse
+
+# find_inverse used to be defined here; it is re-exported so midterm2.find_inverse keeps working
+__all__ = ["black_scholes", "mode_of_ST", "option_delta", "Option", "taylor_option_approx", "find_inverse"]
 
 #   solving for price of option
 
+@probe
 def black_scholes(S, X, T, t, r, sigma, option_type="call"):
     """
     Solve Black-Scholes equations for European call/put options.
@@ -22,9 +29,9 @@ def black_scholes(S, X, T, t, r, sigma, option_type="call"):
     d2 = d1 - sigma * np.sqrt(tau)
     
     if option_type == "call":
-        price = S * norm.cdf(d1) - np.exp(-r * tau) * X * norm.cdf(d2)
+        price = S * normal.cdf(d1) - np.exp(-r * tau) * X * normal.cdf(d2)
     elif option_type == "put":
-        price = np.exp(-r * tau) * X * norm.cdf(-d2) - S * norm.cdf(-d1)
+        price = np.exp(-r * tau) * X * normal.cdf(-d2) - S * normal.cdf(-d1)
     else:
         raise ValueError("option_type must be 'call' or 'put' -lowercase-")
 
@@ -52,6 +59,7 @@ def mode_of_ST(S, T, t, mu, sigma):
 
 #           Solving for delta
 
+@probe
 def option_delta(S, strike, r, sigma, time, option_type = 'call'):
     """
     Compute optimal delta to elimate stochastic process
@@ -68,15 +76,17 @@ def option_delta(S, strike, r, sigma, time, option_type = 'call'):
     d1 = (np.log(S / strike) + (r + 0.5 * sigma ** 2) * tau) / (sigma * np.sqrt(tau))
 
     if option_type == "call":
-        delta = norm.cdf(d1)
+        delta = normal.cdf(d1)
     elif option_type == "put":
-        delta = norm.cdf(-d1)-1
+        delta = normal.cdf(-d1)-1
     else:
         raise ValueError("option_type must be 'call' or 'put' -lowercase-")
 
     return delta
 
-class Option:
+class Option(CachedInputs):
+    __slots__ = ("option_type", "premium")
+
     def __init__(self, S, E, T, r, sigma=None, premium=None, option_type='call'):
         """
         Initialize an Option instance.
@@ -97,10 +107,12 @@ class Option:
             option_type : str, default 'call'
                 Type of option: 'call' or 'put'.
         """
+        self._cache = None
         self.S = S
         self.K = E
         self.T = T
         self.r = r
+        self.sigma = None
         self.option_type = option_type.lower()
         
         if sigma is None and premium is None:
@@ -113,97 +125,97 @@ class Option:
         else:
             self.sigma = sigma
             self.premium = premium if premium is not None else self.price()
-    
+
     def d1(self, sigma=None):
         """
         Calculate the d1 term used in the Black-Scholes formulas.
         """
-        sigma = sigma if sigma is not None else self.sigma
+        if sigma is None:
+            return self._state()[0]
         return (np.log(self.S / self.K) + (self.r + 0.5 * sigma ** 2) * self.T) / (sigma * np.sqrt(self.T))
     
     def d2(self, sigma=None):
         """
         Calculate the d2 term used in the Black-Scholes formulas.
         """
-        sigma = sigma if sigma is not None else self.sigma
+        if sigma is None:
+            return self._state()[1]
         return self.d1(sigma) - sigma * np.sqrt(self.T)
     
+    @probe
     def price(self, sigma=None):
         """
         Compute the Black-Scholes price for the option.
         """
-        sigma = sigma if sigma is not None else self.sigma
-        d1 = self.d1(sigma)
-        d2 = self.d2(sigma)
+        if sigma is None:
+            _, _, Nd1, Nd2, N_d1, N_d2, _, _, disc_K = self._state()
+        else:
+            d1 = self.d1(sigma)
+            d2 = d1 - sigma * np.sqrt(self.T)
+            disc_K = self.K * np.exp(-self.r * self.T)
+            if self.option_type == 'put':
+                N_d1, N_d2 = normal.cdf(-d1), normal.cdf(-d2)
+            else:
+                Nd1, Nd2 = normal.cdf(d1), normal.cdf(d2)
         if self.option_type == 'call':
-            return self.S * norm.cdf(d1) - self.K * np.exp(-self.r * self.T) * norm.cdf(d2)
+            return self.S * Nd1 - disc_K * Nd2
         elif self.option_type == 'put':
-            return self.K * np.exp(-self.r * self.T) * norm.cdf(-d2) - self.S * norm.cdf(-d1)
+            return disc_K * N_d2 - self.S * N_d1
         else:
             raise ValueError("Invalid option type. Use 'call' or 'put'.")
     
+    @probe
     def delta(self):
         """
         Calculate and return the option's delta.
         """
-        d1 = self.d1()
+        Nd1 = self._state()[2]
         if self.option_type == 'call':
-            return norm.cdf(d1)
+            return Nd1
         elif self.option_type == 'put':
-            return norm.cdf(d1) - 1
+            return Nd1 - 1
     
+    @probe
     def gamma(self):
         """
         Calculate and return the option's gamma.
         """
-        d1 = self.d1()
-        return norm.pdf(d1) / (self.S * self.sigma * np.sqrt(self.T))
+        _, _, _, _, _, _, nd1, sqrt_t, _ = self._state()
+        return nd1 / (self.S * self.sigma * sqrt_t)
     
+    @probe
     def theta(self):
         """
         Calculate and return the option's theta.
         """
-        d1 = self.d1()
-        d2 = self.d2()
-        term1 = - (self.S * norm.pdf(d1) * self.sigma) / (2 * np.sqrt(self.T))
+        _, _, _, Nd2, _, N_d2, nd1, sqrt_t, disc_K = self._state()
+        term1 = - (self.S * nd1 * self.sigma) / (2 * sqrt_t)
         if self.option_type == 'call':
-            term2 = - self.r * self.K * np.exp(-self.r * self.T) * norm.cdf(d2)
+            term2 = - self.r * disc_K * Nd2
             return term1 + term2
         elif self.option_type == 'put':
-            term2 = self.r * self.K * np.exp(-self.r * self.T) * norm.cdf(-d2)
+            term2 = self.r * disc_K * N_d2
             return term1 + term2
     
+    @probe
     def vega(self):
         """
         Calculate and return the option's vega.
         """
-        d1 = self.d1()
-        return self.S * norm.pdf(d1) * np.sqrt(self.T)
+        _, _, _, _, _, _, nd1, sqrt_t, _ = self._state()
+        return self.S * nd1 * sqrt_t
     
+    @probe
     def rho(self):
         """
         Calculate and return the option's rho.
         """
-        d2 = self.d2()
+        _, _, _, Nd2, _, N_d2, _, _, disc_K = self._state()
         if self.option_type == 'call':
-            return self.T * self.K * np.exp(-self.r * self.T) * norm.cdf(d2)
+            return self.T * disc_K * Nd2
         elif self.option_type == 'put':
-            return -self.T * self.K * np.exp(-self.r * self.T) * norm.cdf(-d2)
+            return -self.T * disc_K * N_d2
         
-def find_inverse(o: Option, func, target: float, change_param: str, eps:float=.0001, lower_bound=-300, upper_bound=300, max_iters=30):
-    mid = (upper_bound + lower_bound) / 2
-    setattr(o, change_param, mid)
-    delta = func() - target
-    print(mid, delta)
-    if abs(delta) < eps or max_iters <= 0:
-        return getattr(o, change_param)
-    else:
-        if delta > 0:
-            return find_inverse(o, func, target, change_param, eps, lower_bound, mid, max_iters-1)
-        else:
-            return find_inverse(o, func, target, change_param, eps, mid, upper_bound, max_iters-1)
-
-
 
 def taylor_option_approx(o: Option, ds: float):
     return o.price() + o.delta() * ds + o.gamma() / 2 * ds ** 2
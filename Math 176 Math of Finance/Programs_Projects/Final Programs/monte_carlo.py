@@ -0,0 +1,229 @@
+import math
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from bs_chain import bs_price
+from instrument import probe
+
+"""
+
+Monte Carlo GBM simulation and path-dependent option pricing.
+
+Paths are generated chunk by chunk (each chunk with its own spawned seed), so
+memory stays at one (chunk x steps) block and results don't depend on how
+many worker processes share the chunks.
+
+Sample code:
+
+o = Option(100, 100, 1, .05, .2)
+price_mc(o, AsianPayoff(100, 'call'), n_paths=1_000_000, workers=4)
+price_mc(o, BarrierPayoff(100, 130, 'call', 'up-and-out'))
+validate_against_black_scholes(o)
+
+"""
+
+
+def gbm_paths(S, T, sigma, steps, n_paths, mu=0.0, rng=None, z=None):
+    """
+    Simulate GBM paths dS = mu S dt + sigma S dW on an even time grid.
+
+    :param S:       Starting price
+    :param T:       Horizon in years
+    :param sigma:   Volatility
+    :param steps:   Number of time steps
+    :param n_paths: Number of paths (ignored if z is given)
+    :param mu:      Drift (use r for risk-neutral pricing)
+    :param rng:     np.random.Generator
+    :param z:       Optional (n_paths, steps) standard normals to use instead of drawing
+    :return:        (n_paths, steps + 1) array, column 0 is S
+    """
+    if z is None:
+        rng = rng if rng is not None else np.random.default_rng()
+        z = rng.standard_normal((n_paths, steps))
+    dt = T / steps
+    log_steps = (mu - 0.5 * sigma ** 2) * dt + sigma * math.sqrt(dt) * z
+    paths = np.empty((z.shape[0], steps + 1))
+    paths[:, 0] = S
+    paths[:, 1:] = S * np.exp(np.cumsum(log_steps, axis=1))
+    return paths
+
+
+#           Payoffs
+#
+# Payoffs are small classes rather than closures so they can be pickled to
+# worker processes. strike/kind tell price_mc which European payoff to use as
+# a control variate.
+
+
+class EuropeanPayoff:
+    def __init__(self, K, kind="call"):
+        self.strike, self.kind = K, kind
+
+    def __call__(self, paths):
+        ST = paths[:, -1]
+        return np.maximum(ST - self.strike, 0) if self.kind == "call" else np.maximum(self.strike - ST, 0)
+
+
+class AsianPayoff:
+    def __init__(self, K, kind="call", average="arithmetic"):
+        """
+        Fixed-strike Asian option on the average of the monitoring points (S0 excluded).
+        """
+        self.strike, self.kind, self.average = K, kind, average
+
+    def __call__(self, paths):
+        monitored = paths[:, 1:]
+        if self.average == "geometric":
+            avg = np.exp(np.log(monitored).mean(axis=1))
+        else:
+            avg = monitored.mean(axis=1)
+        return np.maximum(avg - self.strike, 0) if self.kind == "call" else np.maximum(self.strike - avg, 0)
+
+
+class BarrierPayoff:
+    def __init__(self, K, barrier, kind="call", barrier_type="up-and-out"):
+        """
+        Discretely monitored knock-in/knock-out option.
+
+        :param barrier_type: 'up-and-out', 'up-and-in', 'down-and-out' or 'down-and-in'
+        """
+        self.strike, self.barrier, self.kind, self.barrier_type = K, barrier, kind, barrier_type
+
+    def __call__(self, paths):
+        direction, _, knock = self.barrier_type.split("-")
+        if direction == "up":
+            hit = paths.max(axis=1) >= self.barrier
+        else:
+            hit = paths.min(axis=1) <= self.barrier
+        alive = ~hit if knock == "out" else hit
+        return EuropeanPayoff(self.strike, self.kind)(paths) * alive
+
+
+class LookbackPayoff:
+    def __init__(self, kind="call", K=None):
+        """
+        Lookback option: floating strike when K is None (call S_T - min, put max - S_T),
+        otherwise fixed strike (call max - K, put K - min).
+        """
+        self.kind, self.strike = kind, K
+
+    def __call__(self, paths):
+        if self.strike is None:
+            if self.kind == "call":
+                return paths[:, -1] - paths.min(axis=1)
+            return paths.max(axis=1) - paths[:, -1]
+        if self.kind == "call":
+            return np.maximum(paths.max(axis=1) - self.strike, 0)
+        return np.maximum(self.strike - paths.min(axis=1), 0)
+
+
+class MCResult:
+    __slots__ = ("price", "std_error", "n_paths", "control_beta")
+
+    def __init__(self, price, std_error, n_paths, control_beta=None):
+        self.price = price
+        self.std_error = std_error
+        self.n_paths = n_paths
+        self.control_beta = control_beta
+
+    def confidence_interval(self, z=1.96):
+        return self.price - z * self.std_error, self.price + z * self.std_error
+
+    def __repr__(self):
+        return f"MCResult(price={self.price:.6f}, std_error={self.std_error:.6f}, n_paths={self.n_paths})"
+
+
+def _chunk_sums(seed, n, S, T, r, sigma, steps, payoff, antithetic, control):
+    """
+    Simulate one chunk and return its sufficient statistics
+    (count, sum Y, sum Y^2, sum X, sum X^2, sum XY), where Y is the discounted
+    payoff and X the discounted control. With antithetic sampling each
+    (Z, -Z) pair counts as one observation.
+    """
+    rng = np.random.default_rng(seed)
+    disc = math.exp(-r * T)
+    half = (n + 1) // 2 if antithetic else n
+    z = rng.standard_normal((half, steps))
+
+    def evaluate(zz):
+        paths = gbm_paths(S, T, sigma, steps, zz.shape[0], mu=r, z=zz)
+        return disc * payoff(paths), disc * control(paths)
+
+    y, x = evaluate(z)
+    if antithetic:
+        y_anti, x_anti = evaluate(-z)
+        y, x = (y + y_anti) / 2, (x + x_anti) / 2
+    return np.array([y.shape[0], y.sum(), (y * y).sum(), x.sum(), (x * x).sum(), (x * y).sum()])
+
+
+@probe
+def price_mc(o, payoff=None, steps=252, n_paths=200_000, chunk_size=20_000, seed=0, antithetic=True,
+             control_variate=True, workers=1):
+    """
+    Monte Carlo price of a (path-dependent) payoff on an Option's underlying.
+
+    :param o:               Anything with S, T, r, sigma (and K, option_type if payoff is None)
+    :param payoff:          Payoff object; defaults to the European payoff of o
+    :param steps:           Time steps per path
+    :param n_paths:         Total paths (antithetic pairs count as two)
+    :param chunk_size:      Paths simulated per block; bounds memory at chunk_size * steps floats
+    :param seed:            Root seed; chunk seeds are spawned from it, so results are
+                            identical for any number of workers
+    :param antithetic:      Pair each draw with its negation
+    :param control_variate: Regress on the European payoff with the same strike/type
+                            (closed-form Black-Scholes mean), or on discounted S_T when
+                            the payoff has no strike
+    :param workers:         Processes to spread chunks over (1 runs in-process)
+    :return:                MCResult with price and standard error
+    """
+    if payoff is None:
+        payoff = EuropeanPayoff(o.K, o.option_type)
+    S, T, r, sigma = float(o.S), float(o.T), float(o.r), float(o.sigma)
+
+    if getattr(payoff, "strike", None) is not None:
+        control = EuropeanPayoff(payoff.strike, payoff.kind)
+        control_mean = float(bs_price(S, payoff.strike, T, r, sigma, payoff.kind == "call"))
+    else:
+        control = EuropeanPayoff(0.0, "call")   # S_T itself
+        control_mean = S
+
+    sizes = [chunk_size] * (n_paths // chunk_size) + ([n_paths % chunk_size] if n_paths % chunk_size else [])
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = [(s, n, S, T, r, sigma, steps, payoff, antithetic, control) for s, n in zip(seeds, sizes)]
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            sums = sum(pool.map(_chunk_sums, *zip(*args)))
+    else:
+        sums = sum(_chunk_sums(*a) for a in args)
+
+    n, sy, syy, sx, sxx, sxy = sums
+    mean_y, mean_x = sy / n, sx / n
+    var_y = (syy - n * mean_y ** 2) / (n - 1)
+    if not control_variate:
+        return MCResult(mean_y, math.sqrt(var_y / n), n_paths)
+
+    var_x = (sxx - n * mean_x ** 2) / (n - 1)
+    cov = (sxy - n * mean_x * mean_y) / (n - 1)
+    beta = cov / var_x if var_x > 0 else 0.0
+    price = mean_y - beta * (mean_x - control_mean)
+    resid = max(var_y - beta * cov, 0.0)
+    return MCResult(price, math.sqrt(resid / n), n_paths, beta)
+
+
+def validate_against_black_scholes(o, n_paths=200_000, steps=1, seed=0, workers=1):
+    """
+    Price o's European payoff by simulation (no control variate, which would
+    make the check circular) and compare with closed-form black_scholes.
+
+    :return: dict with mc, closed_form, std_error and the error in standard errors
+    """
+    from midterm2 import black_scholes
+
+    mc = price_mc(o, steps=steps, n_paths=n_paths, seed=seed, control_variate=False, workers=workers)
+    exact = float(black_scholes(o.S, o.K, o.T, 0, o.r, o.sigma, o.option_type))
+    return {
+        "mc": mc.price,
+        "closed_form": exact,
+        "std_error": mc.std_error,
+        "z_score": (mc.price - exact) / mc.std_error,
+    }
@@ -0,0 +1,233 @@
+import numpy as np
+import pandas as pd
+from bs_chain import GREEKS, broadcast_chain, is_call_mask, price_chain
+
+"""
+
+Columnar option book: one NumPy column per field instead of one Option object per position.
+
+Sample code:
+
+book = OptionBook(S=[100, 100, 50], K=[95, 105, 50], T=.5, r=.03, sigma=[.2, .25, .4],
+                  option_type=['call', 'put', 'call'], underlying=['SPY', 'SPY', 'QQQ'], quantity=[10, -5, 3])
+book.price()
+book.exposure()             # net delta/gamma/vega per underlying
+book[0].delta()             # Option-like row view
+book.filter(book.T < .25)
+
+"""
+
+def _column(name):
+    def get(self):
+        return self.book.columns[name][self.i]
+
+    def set(self, value):
+        self.book.columns[name][self.i] = value
+        self.book._greeks = None
+
+    return property(get, set)
+
+
+class OptionView:
+    """
+    Option-like view of one row in an OptionBook. Reads and writes go straight
+    to the book's columns; nothing is copied.
+    """
+    __slots__ = ("book", "i")
+
+    S = _column("S")
+    K = _column("K")
+    T = _column("T")
+    r = _column("r")
+    sigma = _column("sigma")
+    premium = _column("premium")
+    quantity = _column("quantity")
+
+    def __init__(self, book, i):
+        self.book = book
+        self.i = i
+
+    @property
+    def option_type(self):
+        return "call" if self.book.is_call[self.i] else "put"
+
+    @property
+    def underlying(self):
+        return self.book.underlying[self.i]
+
+    def _greek(self, name):
+        return self.book.greeks()[name][self.i]
+
+    def price(self):
+        return self._greek("price")
+
+    def delta(self):
+        return self._greek("delta")
+
+    def gamma(self):
+        return self._greek("gamma")
+
+    def theta(self):
+        return self._greek("theta")
+
+    def vega(self):
+        return self._greek("vega")
+
+    def rho(self):
+        return self._greek("rho")
+
+    def __repr__(self):
+        return (f"OptionView({self.underlying!r}, {self.option_type}, S={self.S}, K={self.K}, "
+                f"T={self.T}, r={self.r}, sigma={self.sigma}, qty={self.quantity})")
+
+
+class OptionBook:
+    __slots__ = ("columns", "is_call", "underlying", "_greeks")
+
+    def __init__(self, S, K, T, r, sigma, premium=None, option_type='call', underlying="", quantity=1.0):
+        """
+        Initialize an OptionBook.
+
+        Parameters:
+            S, K, T, r, sigma : float or array-like
+                Black-Scholes inputs, broadcast against each other.
+            premium : float or array-like, optional
+                Market prices. Defaults to the model price.
+            option_type : str or array-like, default 'call'
+                'call'/'put' per row.
+            underlying : str or array-like, default ""
+                Underlying label per row, used by exposure().
+            quantity : float or array-like, default 1.0
+                Signed position size per row (negative for short).
+        """
+        S, K, T, r, sigma, quantity = broadcast_chain(S, K, T, r, sigma, quantity)
+        n = S.shape[0]
+        self.columns = {
+            "S": np.array(S),
+            "K": np.array(K),
+            "T": np.array(T),
+            "r": np.array(r),
+            "sigma": np.array(sigma),
+            "quantity": np.array(quantity),
+        }
+        self.is_call = np.array(is_call_mask(option_type, n))
+        self.underlying = np.array(np.broadcast_to(np.asarray(underlying, dtype=object), (n,)))
+        self._greeks = None
+        if premium is None:
+            self.columns["premium"] = self.greeks()["price"].copy()
+        else:
+            self.columns["premium"] = np.array(np.broadcast_to(np.asarray(premium, dtype=float), (n,)))
+
+    @classmethod
+    def from_options(cls, options, underlying="", quantity=1.0):
+        """
+        Build a book from an iterable of Option objects.
+        """
+        options = list(options)
+        fields = {c: [getattr(o, c) for o in options] for c in ("S", "K", "T", "r", "sigma", "premium")}
+        return cls(option_type=[o.option_type for o in options], underlying=underlying, quantity=quantity, **fields)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame):
+        """
+        Build a book from a DataFrame with columns S, K, T, r, sigma and
+        optionally premium, option_type, underlying, quantity.
+        """
+        optional = {c: df[c].to_numpy() for c in ("premium", "option_type", "underlying", "quantity") if c in df}
+        return cls(*(df[c].to_numpy() for c in ("S", "K", "T", "r", "sigma")), **optional)
+
+    def __len__(self):
+        return self.is_call.shape[0]
+
+    def __getattr__(self, name):
+        if name == "columns":
+            raise AttributeError(name)
+        try:
+            return self.columns[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __getitem__(self, key):
+        """
+        book[i] gives an OptionView; a slice, index array or boolean mask gives a sub-book.
+        """
+        if isinstance(key, (int, np.integer)):
+            return OptionView(self, range(len(self))[key])
+        return self.filter(key)
+
+    def __iter__(self):
+        return (OptionView(self, i) for i in range(len(self)))
+
+    def filter(self, mask):
+        """
+        New book holding a copy of the rows selected by a boolean mask, slice or index array.
+        """
+        sub = OptionBook.__new__(OptionBook)
+        sub.columns = {c: np.array(v[mask]) for c, v in self.columns.items()}
+        sub.is_call = np.array(self.is_call[mask])
+        sub.underlying = np.array(self.underlying[mask])
+        sub._greeks = None if self._greeks is None else {g: v[mask] for g, v in self._greeks.items()}
+        return sub
+
+    def invalidate(self):
+        """
+        Drop cached Greeks after writing to the columns directly.
+        """
+        self._greeks = None
+
+    def greeks(self):
+        """
+        Price and all Greeks per row (dict of arrays), computed in one vectorized
+        pass and cached until a column is changed through a view or invalidate().
+        """
+        if self._greeks is None:
+            c = self.columns
+            self._greeks = price_chain(c["S"], c["K"], c["T"], c["r"], c["sigma"], self.is_call)
+        return self._greeks
+
+    def price(self):
+        return self.greeks()["price"]
+
+    def delta(self):
+        return self.greeks()["delta"]
+
+    def gamma(self):
+        return self.greeks()["gamma"]
+
+    def theta(self):
+        return self.greeks()["theta"]
+
+    def vega(self):
+        return self.greeks()["vega"]
+
+    def rho(self):
+        return self.greeks()["rho"]
+
+    def mark_to_model(self):
+        """
+        Model price minus premium per position, scaled by quantity.
+        """
+        return (self.price() - self.columns["premium"]) * self.columns["quantity"]
+
+    def exposure(self, greeks=("delta", "gamma", "vega")):
+        """
+        Net quantity-weighted Greeks per underlying.
+
+        :param greeks: Names from GREEKS to aggregate
+        :return:       DataFrame indexed by underlying with one column per Greek
+        """
+        labels, inverse = np.unique(self.underlying.astype(str), return_inverse=True)
+        g = self.greeks()
+        qty = self.columns["quantity"]
+        data = {}
+        for name in greeks:
+            if name not in GREEKS:
+                raise ValueError(f"Unknown greek {name!r}; choose from {GREEKS}")
+            data[name] = np.bincount(inverse, weights=g[name] * qty, minlength=labels.shape[0])
+        return pd.DataFrame(data, index=pd.Index(labels, name="underlying"))
+
+    def to_frame(self):
+        df = pd.DataFrame(self.columns)
+        df["option_type"] = np.where(self.is_call, "call", "put")
+        df["underlying"] = self.underlying
+        return df
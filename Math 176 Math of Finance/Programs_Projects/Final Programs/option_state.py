@@ -0,0 +1,64 @@
+import numpy as np
+import normal
+
+"""
+
+Cached Black-Scholes state shared by the Option classes in hist_vol and midterm2.
+
+The pricing inputs S, K, T, r and sigma live in slots behind _Param
+descriptors; assigning any of them drops the cached d1/d2/N(d) terms, so
+setattr-driven solvers (find_inverse) always price with fresh values while
+repeated Greek calls on an unchanged option reuse one evaluation.
+
+Sample code:
+
+class Option(CachedInputs):
+    __slots__ = ("option_type", "premium")
+
+d1, d2, Nd1, Nd2, N_d1, N_d2, nd1, sqrt_t, disc_K = o._state()
+
+"""
+
+
+class _Param:
+    """
+    Pricing input stored in a slot; assigning a new value drops the cached
+    d1/d2/N(d) state of the owning Option.
+    """
+    __slots__ = ("slot",)
+
+    def __set_name__(self, owner, name):
+        self.slot = "_" + name
+
+    def __get__(self, obj, owner=None):
+        return self if obj is None else getattr(obj, self.slot)
+
+    def __set__(self, obj, value):
+        setattr(obj, self.slot, value)
+        obj._cache = None
+
+
+class CachedInputs:
+    __slots__ = ("_S", "_K", "_T", "_r", "_sigma", "_cache")
+
+    S = _Param()
+    K = _Param()
+    T = _Param()
+    r = _Param()
+    sigma = _Param()
+
+    def _state(self):
+        """
+        Lazily compute and cache
+        (d1, d2, N(d1), N(d2), N(-d1), N(-d2), n(d1), sqrt(T), K e^(-rT)).
+
+        N(-d) is evaluated directly rather than as 1 - N(d), which would
+        cancel to zero for deep out-of-the-money puts.
+        """
+        if self._cache is None:
+            sqrt_t = np.sqrt(self.T)
+            d1 = (np.log(self.S / self.K) + (self.r + 0.5 * self.sigma ** 2) * self.T) / (self.sigma * sqrt_t)
+            d2 = d1 - self.sigma * sqrt_t
+            self._cache = (d1, d2, normal.cdf(d1), normal.cdf(d2), normal.cdf(-d1), normal.cdf(-d2),
+                           normal.pdf(d1), sqrt_t, self.K * np.exp(-self.r * self.T))
+        return self._cache
@@ -0,0 +1,165 @@
+import itertools
+import numpy as np
+import pandas as pd
+
+"""
+
+Parimutuel pool that follows a live stream of wagers.
+
+The pool keeps the running total and one stake per runner, so every wager is
+an O(1) update and any runner's odds can be read in O(1). With track take t
+(the horserace notebook's "cents on the dollar"):
+
+    track profit   = t * total
+    odds_i         = ((1 - t) * total - stake_i) / stake_i   (to 1)
+    money share_i  = stake_i / total
+    implied p_i    = 1 / (1 + odds_i) = stake_i / ((1 - t) * total)
+
+Sample code:
+
+pool = ParimutuelPool(['A', 'B', 'C', 'D', 'E', 'F'], take=.05)
+pool.bet('A', 500)
+pool.bet_many(['B', 'C', 'A'], [400, 500, 20])
+pool.odds('A'), pool.track_profit
+pool.snapshot()
+
+"""
+
+
+class ParimutuelPool:
+    def __init__(self, runners=(), take=0.05):
+        """
+        :param runners: Runner names known up front (more can be added later)
+        :param take:    Fraction of the pool kept by the track
+        """
+        self.take = take
+        self.names = []
+        self._position = {}
+        self._labels = None
+        self._stakes = np.zeros(max(len(runners), 8))
+        self.total = 0.0
+        self.n_wagers = 0
+        for name in runners:
+            self.add_runner(name)
+
+    @classmethod
+    def from_series(cls, stakes: pd.Series, take=0.05):
+        """
+        Pool seeded with the money already bet on each runner (the notebook's parameters Series).
+        """
+        pool = cls(stakes.index, take)
+        pool.bet_many(stakes.index, stakes.to_numpy(dtype=float))
+        return pool
+
+    def add_runner(self, name):
+        if name in self._position:
+            raise ValueError(f"runner {name!r} already in the pool")
+        if len(self.names) == self._stakes.shape[0]:
+            self._stakes = np.concatenate([self._stakes, np.zeros(self._stakes.shape[0])])
+        self._position[name] = len(self.names)
+        self.names.append(name)
+        self._labels = None
+        return self._position[name]
+
+    def _index(self, runner):
+        try:
+            return self._position[runner]
+        except KeyError:
+            raise KeyError(f"unknown runner {runner!r}") from None
+
+    @property
+    def stakes(self):
+        return self._stakes[:len(self.names)]
+
+    def bet(self, runner, amount):
+        """
+        Add one wager in O(1).
+        """
+        if amount < 0:
+            raise ValueError("wager amounts must be non-negative")
+        self._stakes[self._index(runner)] += amount
+        self.total += amount
+        self.n_wagers += 1
+
+    def bet_many(self, runners, amounts):
+        """
+        Add a batch of wagers with one vectorized scatter-add.
+        """
+        amounts = np.asarray(amounts, dtype=float)
+        if (amounts < 0).any():
+            raise ValueError("wager amounts must be non-negative")
+        if self._labels is None:
+            self._labels = pd.Index(self.names)
+        idx = self._labels.get_indexer(pd.Index(runners))
+        if (idx < 0).any():
+            raise KeyError(f"unknown runners {sorted(set(np.asarray(runners)[idx < 0].tolist()))}")
+        self.stakes[:] += np.bincount(idx, weights=amounts, minlength=len(self.names))
+        self.total += float(amounts.sum())
+        self.n_wagers += amounts.shape[0]
+
+    def ingest(self, wagers, chunk_size=100_000):
+        """
+        Consume an iterable of (runner, amount) pairs in chunks through bet_many.
+
+        :return: Number of wagers ingested
+        """
+        wagers = iter(wagers)
+        count = 0
+        while True:
+            chunk = list(itertools.islice(wagers, chunk_size))
+            if not chunk:
+                return count
+            runners, amounts = zip(*chunk)
+            self.bet_many(runners, amounts)
+            count += len(chunk)
+
+    @property
+    def track_profit(self):
+        return self.take * self.total
+
+    @property
+    def net_pool(self):
+        """
+        Money returned to winning bettors.
+        """
+        return (1 - self.take) * self.total
+
+    def odds(self, runner):
+        """
+        Current odds to 1 on one runner (inf while nothing is bet on it).
+        """
+        stake = self._stakes[self._index(runner)]
+        return (self.net_pool - stake) / stake if stake > 0 else np.inf
+
+    def payout(self, runner):
+        """
+        Return per unit staked if the runner wins, 1 + odds.
+        """
+        stake = self._stakes[self._index(runner)]
+        return self.net_pool / stake if stake > 0 else np.inf
+
+    def money_share(self, runner):
+        return self._stakes[self._index(runner)] / self.total if self.total else np.nan
+
+    def implied_probability(self, runner):
+        return self._stakes[self._index(runner)] / self.net_pool if self.total else np.nan
+
+    def snapshot(self) -> pd.DataFrame:
+        """
+        Odds, shares and implied probabilities of every runner at this moment.
+        """
+        stakes = self.stakes.copy()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            payout = self.net_pool / stakes
+            df = pd.DataFrame({
+                "stake": stakes,
+                "odds": payout - 1,
+                "payout": payout,
+                "money_share": stakes / self.total,
+                "implied_probability": stakes / self.net_pool,
+            }, index=pd.Index(self.names, name="runner"))
+        df.attrs.update(total=self.total, track_profit=self.track_profit, n_wagers=self.n_wagers)
+        return df
+
+    def __repr__(self):
+        return f"ParimutuelPool(runners={len(self.names)}, total={self.total:.2f}, wagers={self.n_wagers})"
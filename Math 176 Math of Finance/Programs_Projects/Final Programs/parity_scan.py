@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+
+"""
+
+Put-call parity arbitrage scanner over whole chains.
+
+With dividend yield q, parity reads C - P = S e^(-qT) - K e^(-rT). Trading
+at the quoted bid/ask, the two locked-in trades are worth (in PV)
+
+    conversion (sell call, buy put, buy stock):
+        C_bid - P_ask - S_ask e^(-qT) + K e^(-rT)
+    reversal (buy call, sell put, short stock, paying borrow b):
+        P_bid - C_ask + S_bid e^(-(q+b)T) - K e^(-rT)
+
+less a per-trade cost. Edges are cached per row, so a refresh only recomputes
+rows whose quotes changed.
+
+Sample code:
+
+scan = ParityScanner(chain_df)          # columns listed in ParityScanner.COLUMNS
+scan.opportunities(min_edge=.05)
+scan.update_quotes(changed_df)          # only those rows are re-evaluated
+scan.update_spot('SPY', 501.2, 501.3)   # every row of one underlying
+
+"""
+
+
+class ParityScanner:
+    COLUMNS = ("underlying", "K", "T", "r", "q", "S_bid", "S_ask", "call_bid", "call_ask", "put_bid", "put_ask")
+    KEYS = ["underlying", "T", "K"]
+
+    def __init__(self, chain: pd.DataFrame, borrow=0.0, cost=0.0):
+        """
+        :param chain:  One row per (underlying, expiry, strike) with COLUMNS;
+                       q defaults to 0 if missing
+        :param borrow: Annual stock borrow fee charged on reversals
+        :param cost:   Total transaction cost per three-leg trade, in currency
+        """
+        chain = chain.copy()
+        if "q" not in chain:
+            chain["q"] = 0.0
+        missing = set(self.COLUMNS) - set(chain.columns)
+        if missing:
+            raise ValueError(f"chain is missing columns {sorted(missing)}")
+        chain = chain.reset_index(drop=True)
+        self.keys = pd.MultiIndex.from_frame(chain[self.KEYS])
+        self.underlying = chain["underlying"].to_numpy()
+        self.cols = {c: np.array(chain[c], dtype=float) for c in self.COLUMNS if c != "underlying"}
+        self.borrow = borrow
+        self.cost = cost
+        n = chain.shape[0]
+        self.conversion = np.empty(n)
+        self.reversal = np.empty(n)
+        self.evaluations = 0
+        self._evaluate(np.arange(n))
+
+    def _evaluate(self, rows):
+        """
+        Recompute both edges for the given row indices only.
+        """
+        c = {k: v[rows] for k, v in self.cols.items()}
+        disc_K = c["K"] * np.exp(-c["r"] * c["T"])
+        carry = np.exp(-c["q"] * c["T"])
+        short_carry = np.exp(-(c["q"] + self.borrow) * c["T"])
+        self.conversion[rows] = c["call_bid"] - c["put_ask"] - c["S_ask"] * carry + disc_K - self.cost
+        self.reversal[rows] = c["put_bid"] - c["call_ask"] + c["S_bid"] * short_carry - disc_K - self.cost
+        self.evaluations += np.size(rows)
+
+    def update_quotes(self, changes: pd.DataFrame):
+        """
+        Apply new quotes for existing (underlying, T, K) rows and re-evaluate only them.
+
+        :param changes: DataFrame with the key columns plus any quote columns to overwrite
+        :return:        Indices of the rows that were refreshed
+        """
+        rows = self.keys.get_indexer(pd.MultiIndex.from_frame(changes[self.KEYS]))
+        if (rows < 0).any():
+            raise KeyError(f"{int((rows < 0).sum())} quotes do not match any chain row")
+        for col in changes.columns:
+            if col in self.cols:
+                self.cols[col][rows] = changes[col].to_numpy(dtype=float)
+        self._evaluate(rows)
+        return rows
+
+    def update_spot(self, underlying, bid, ask):
+        """
+        New stock quote for one underlying; re-evaluates that underlying's rows.
+        """
+        rows = np.flatnonzero(self.underlying == underlying)
+        self.cols["S_bid"][rows] = bid
+        self.cols["S_ask"][rows] = ask
+        self._evaluate(rows)
+        return rows
+
+    def edges(self) -> pd.DataFrame:
+        """
+        Current conversion and reversal edge for every row.
+        """
+        df = self.keys.to_frame(index=False)
+        df["conversion"] = self.conversion
+        df["reversal"] = self.reversal
+        return df
+
+    def opportunities(self, min_edge=0.0, top=None) -> pd.DataFrame:
+        """
+        Rows where either trade is worth more than min_edge, best first.
+
+        :return: DataFrame with keys, trade ('conversion'/'reversal') and edge
+        """
+        best_is_conv = self.conversion >= self.reversal
+        edge = np.where(best_is_conv, self.conversion, self.reversal)
+        rows = np.flatnonzero(edge > min_edge)
+        rows = rows[np.argsort(-edge[rows], kind="stable")]
+        if top is not None:
+            rows = rows[:top]
+        df = self.keys[rows].to_frame(index=False)
+        df["trade"] = np.where(best_is_conv[rows], "conversion", "reversal")
+        df["edge"] = edge[rows]
+        return df
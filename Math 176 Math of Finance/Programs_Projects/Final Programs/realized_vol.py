@@ -0,0 +1,254 @@
+import math
+import numpy as np
+from scipy.signal import lfilter
+
+"""
+
+Realized volatility estimators.
+
+Sample code:
+
+rv = RunningVol()
+for p in prices:
+    rv.update(p)
+rv.annualized_vol
+
+rv.update_many(next_chunk_of_prices)
+
+rolling_vol(close)                       # close is (time x ticker); {10: ..., 21: ..., 63: ..., 252: ...}
+ewma_vol(close, lam=.94)
+yang_zhang_vol(open_, high, low, close, window=21)
+
+"""
+
+WINDOWS = (10, 21, 63, 252)
+
+
+class RunningVol:
+    """
+    Single-pass mean and variance of log returns (Welford), fed one price or
+    one chunk of prices at a time. Nothing but the running moments and the
+    last price is kept, so memory is O(1) no matter how long the series.
+    """
+    __slots__ = ("periods_per_year", "n", "mean", "m2", "last_price")
+
+    def __init__(self, periods_per_year=252):
+        self.periods_per_year = periods_per_year
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.last_price = None
+
+    def add_log_return(self, x):
+        """
+        Welford update with one log return.
+        """
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+    def update(self, price):
+        """
+        Feed the next price; the first price only sets the reference point.
+        """
+        if self.last_price is not None:
+            self.add_log_return(math.log(price / self.last_price))
+        self.last_price = price
+
+    def update_many(self, prices):
+        """
+        Feed a chunk of prices in one vectorized step. The chunk's moments are
+        combined with the running ones (Chan et al. parallel update), so the
+        result matches calling update() on each price.
+        """
+        prices = np.asarray(prices, dtype=float)
+        if prices.shape[0] == 0:
+            return
+        if self.last_price is not None:
+            prices = np.concatenate(([self.last_price], prices))
+        self.last_price = float(prices[-1])
+        if prices.shape[0] < 2:
+            return
+        self.add_log_returns(np.diff(np.log(prices)))
+
+    def add_log_returns(self, x):
+        """
+        Merge a chunk of log returns into the running moments.
+        """
+        x = np.asarray(x, dtype=float)
+        if x.shape[0] == 0:
+            return
+        mean_b = x.mean()
+        self._merge(x.shape[0], mean_b, ((x - mean_b) ** 2).sum())
+
+    def merge(self, other: "RunningVol"):
+        """
+        Fold another estimator's moments into this one (e.g. chunks processed in parallel).
+        """
+        self._merge(other.n, other.mean, other.m2)
+
+    def _merge(self, n_b, mean_b, m2_b):
+        if n_b == 0:
+            return
+        n = self.n + n_b
+        delta = mean_b - self.mean
+        self.mean += delta * n_b / n
+        self.m2 += m2_b + delta ** 2 * self.n * n_b / n
+        self.n = n
+
+    @property
+    def variance(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else math.nan
+
+    @property
+    def vol(self):
+        return math.sqrt(self.variance)
+
+    @property
+    def annualized_mean(self):
+        return self.mean * self.periods_per_year if self.n else math.nan
+
+    @property
+    def annualized_vol(self):
+        return self.vol * math.sqrt(self.periods_per_year)
+
+    def __repr__(self):
+        return f"RunningVol(n={self.n}, annualized_mean={self.annualized_mean:.6f}, annualized_vol={self.annualized_vol:.6f})"
+
+
+#           Vectorized engine over (time x ticker) matrices
+#
+# Every function takes arrays shaped (time, ticker) (1-D works as one ticker)
+# and returns arrays of the same shape, NaN until a window has enough data.
+# Windows come from cumulative sums, so cost is O(time * ticker) regardless of
+# window length.
+
+
+def _as_matrix(x):
+    x = np.asarray(x, dtype=float)
+    return (x[:, None], True) if x.ndim == 1 else (x, False)
+
+
+def _restore(x, was_1d):
+    return x[:, 0] if was_1d else x
+
+
+def rolling_mean(x, window):
+    """
+    Trailing mean over `window` rows of a (time, ticker) matrix; rows with
+    fewer than `window` values (or a NaN inside the window) are NaN.
+    """
+    x, was_1d = _as_matrix(x)
+    missing = np.isnan(x)
+    pad = np.zeros((1, x.shape[1]))
+    csum = np.cumsum(np.vstack([pad, np.where(missing, 0, x)]), axis=0)
+    cmiss = np.cumsum(np.vstack([pad, missing]), axis=0)
+    out = np.full(x.shape, np.nan)
+    if window <= x.shape[0]:
+        full = (cmiss[window:] - cmiss[:-window]) == 0
+        out[window - 1:] = np.where(full, (csum[window:] - csum[:-window]) / window, np.nan)
+    return _restore(out, was_1d)
+
+
+def log_returns(prices):
+    """
+    Log returns aligned with prices: row t holds log(P_t / P_{t-1}), row 0 is NaN.
+    """
+    prices, was_1d = _as_matrix(prices)
+    out = np.full(prices.shape, np.nan)
+    out[1:] = np.diff(np.log(prices), axis=0)
+    return _restore(out, was_1d)
+
+
+def rolling_vol(prices, windows=WINDOWS, periods_per_year=252):
+    """
+    Trailing sample volatility of log returns for several window lengths.
+
+    Returns are demeaned per ticker before the cumulative sums so the
+    sum-of-squares formula doesn't lose precision to cancellation.
+
+    :param prices:           (time, ticker) price matrix
+    :param windows:          Window lengths in rows
+    :param periods_per_year: Annualization factor (None for per-period vol)
+    :return:                 {window: (time, ticker) array}
+    """
+    r, was_1d = _as_matrix(log_returns(prices))
+    r = r[1:]
+    r = r - np.nanmean(r, axis=0)
+    scale = periods_per_year if periods_per_year else 1
+    out = {}
+    for w in windows:
+        m1 = _as_matrix(rolling_mean(r, w))[0]
+        m2 = _as_matrix(rolling_mean(r ** 2, w))[0]
+        var = np.maximum(m2 - m1 ** 2, 0) * w / (w - 1)
+        vol = np.full((r.shape[0] + 1, r.shape[1]), np.nan)
+        vol[1:] = np.sqrt(var * scale)
+        out[w] = _restore(vol, was_1d)
+    return out
+
+
+def ewma_vol(prices, lam=0.94, periods_per_year=252, seed_window=21):
+    """
+    RiskMetrics EWMA volatility: s2_t = lam * s2_{t-1} + (1 - lam) * r_t ** 2.
+
+    The recursion runs along the time axis for every ticker at once through
+    an IIR filter. It starts from the mean squared return of the first
+    `seed_window` returns, reported on the row of the last of them; earlier
+    rows are NaN like a rolling estimator's, so no value uses later returns.
+    """
+    r, was_1d = _as_matrix(log_returns(prices))
+    r2 = r[1:] ** 2
+    var = np.full(r.shape, np.nan)
+    if r2.shape[0] >= seed_window:
+        seed = np.mean(r2[:seed_window], axis=0)
+        var[seed_window] = seed
+        var[seed_window + 1:], _ = lfilter([1 - lam], [1, -lam], r2[seed_window:], axis=0, zi=(lam * seed)[None, :])
+    scale = periods_per_year if periods_per_year else 1
+    return _restore(np.sqrt(var * scale), was_1d)
+
+
+def parkinson_vol(high, low, window=21, periods_per_year=252):
+    """
+    Parkinson high-low estimator: var = mean(ln(H/L)^2) / (4 ln 2).
+    """
+    hl = np.log(np.asarray(high, dtype=float) / np.asarray(low, dtype=float)) ** 2
+    scale = periods_per_year if periods_per_year else 1
+    return np.sqrt(rolling_mean(hl, window) / (4 * math.log(2)) * scale)
+
+
+def garman_klass_vol(open_, high, low, close, window=21, periods_per_year=252):
+    """
+    Garman-Klass estimator: var = mean(0.5 ln(H/L)^2 - (2 ln 2 - 1) ln(C/O)^2).
+    """
+    hl = np.log(np.asarray(high, dtype=float) / np.asarray(low, dtype=float))
+    co = np.log(np.asarray(close, dtype=float) / np.asarray(open_, dtype=float))
+    scale = periods_per_year if periods_per_year else 1
+    var = rolling_mean(0.5 * hl ** 2 - (2 * math.log(2) - 1) * co ** 2, window)
+    return np.sqrt(np.maximum(var, 0) * scale)
+
+
+def yang_zhang_vol(open_, high, low, close, window=21, periods_per_year=252):
+    """
+    Yang-Zhang estimator: overnight variance + k * open-to-close variance
+    + (1 - k) * Rogers-Satchell, with k = 0.34 / (1.34 + (n + 1) / (n - 1)).
+    Row 0 has no previous close, so the first value is at row `window`.
+    """
+    o, was_1d = _as_matrix(open_)
+    h, l, c = (_as_matrix(x)[0] for x in (high, low, close))
+    n = window
+
+    overnight = np.full(o.shape, np.nan)
+    overnight[1:] = np.log(o[1:] / c[:-1])
+    open_close = np.log(c / o)
+    rs = np.log(h / c) * np.log(h / o) + np.log(l / c) * np.log(l / o)
+
+    def rolling_var(x):
+        mean = _as_matrix(rolling_mean(x, n))[0]
+        sq = _as_matrix(rolling_mean(x ** 2, n))[0]
+        return np.maximum(sq - mean ** 2, 0) * n / (n - 1)
+
+    k = 0.34 / (1.34 + (n + 1) / (n - 1))
+    var = rolling_var(overnight) + k * rolling_var(open_close) + (1 - k) * _as_matrix(rolling_mean(rs, n))[0]
+    scale = periods_per_year if periods_per_year else 1
+    return _restore(np.sqrt(var * scale), was_1d)
@@ -0,0 +1,159 @@
+import numpy as np
+import pandas as pd
+import normal
+from bs_chain import d1_d2, price_chain
+
+"""
+
+Greeks-based scenario repricing for a whole OptionBook, generalizing
+taylor_option_approx to spot, vol and time shocks.
+
+Each position's Greeks are computed once. The book's P&L for a grid of
+(spot return, vol change, time step) shocks is then
+
+    pnl = F @ W.T
+
+with F the (scenario x 6) matrix of shock terms and W the (underlying x 6)
+quantity-weighted sensitivities:
+
+    dS = S * ret
+    pnl ~ delta dS + 1/2 gamma dS^2 + vega dvol + 1/2 volga dvol^2 + vanna dS dvol + theta dt
+
+Scenarios with shocks beyond the tolerances are fully repriced instead.
+
+Sample code:
+
+engine = ScenarioEngine(book)
+shocks = scenario_grid(np.linspace(-.1, .1, 41), np.linspace(-.05, .05, 11), [0, 1 / 252])
+engine.pnl(shocks)                 # DataFrame: one row per shock, one column per underlying
+engine.check(shocks)               # approximation error against full repricing
+
+"""
+
+TERMS = ("spot", "spot2", "vol", "vol2", "spot_vol", "time")
+
+
+def scenario_grid(spot_returns, vol_changes=(0.0,), time_steps=(0.0,)):
+    """
+    Cartesian product of shocks as an (n, 3) array of (spot return, vol change, dt in years).
+    """
+    grids = np.meshgrid(np.asarray(spot_returns, float), np.asarray(vol_changes, float),
+                        np.asarray(time_steps, float), indexing="ij")
+    return np.column_stack([g.ravel() for g in grids])
+
+
+class ScenarioEngine:
+    def __init__(self, book, max_spot_return=0.15, max_vol_change=0.10, max_time_step=30 / 365):
+        """
+        :param book:            OptionBook to revalue
+        :param max_spot_return: Spot returns beyond this (in absolute value) are fully repriced
+        :param max_vol_change:  Vol changes beyond this are fully repriced
+        :param max_time_step:   Time steps beyond this are fully repriced
+        """
+        self.book = book
+        self.limits = np.array([max_spot_return, max_vol_change, max_time_step])
+        self.labels, self.group = np.unique(book.underlying.astype(str), return_inverse=True)
+        self.base_price = None
+        self.weights = None
+        self.refresh()
+
+    def refresh(self):
+        """
+        Recompute the cached Greeks (after the book's columns changed).
+        """
+        c = self.book.columns
+        S, sigma, qty = c["S"], c["sigma"], c["quantity"]
+        g = price_chain(S, c["K"], c["T"], c["r"], sigma, self.book.is_call)
+        d1, d2, _ = d1_d2(S, c["K"], c["T"], c["r"], sigma)
+        vanna = -normal.pdf(d1) * d2 / sigma
+        volga = g["vega"] * d1 * d2 / sigma
+
+        per_position = np.column_stack([
+            g["delta"] * S,
+            0.5 * g["gamma"] * S ** 2,
+            g["vega"],
+            0.5 * volga,
+            vanna * S,
+            g["theta"],
+        ]) * qty[:, None]
+        weights = np.zeros((self.labels.shape[0], len(TERMS)))
+        np.add.at(weights, self.group, per_position)
+        self.weights = weights
+        self.base_price = g["price"]
+
+    @staticmethod
+    def _features(shocks):
+        ret, dvol, dt = shocks[:, 0], shocks[:, 1], shocks[:, 2]
+        return np.column_stack([ret, ret ** 2, dvol, dvol ** 2, ret * dvol, dt])
+
+    def approx_pnl(self, shocks):
+        """
+        Taylor P&L for every shock and underlying as a single matrix product.
+
+        :return: (scenario, underlying) array
+        """
+        return self._features(np.atleast_2d(shocks)) @ self.weights.T
+
+    def full_pnl(self, shocks):
+        """
+        Exact P&L by Black-Scholes repricing of every position under each shock.
+        Positions whose expiry falls inside the time step are valued at intrinsic.
+
+        :return: (scenario, underlying) array
+        """
+        shocks = np.atleast_2d(shocks)
+        c = self.book.columns
+        qty = c["quantity"]
+        out = np.zeros((shocks.shape[0], self.labels.shape[0]))
+        for k, (ret, dvol, dt) in enumerate(shocks):
+            S = c["S"] * (1 + ret)
+            T = c["T"] - dt
+            live = T > 0
+            price = np.maximum(np.where(self.book.is_call, S - c["K"], c["K"] - S), 0)
+            if live.any():
+                price[live] = price_chain(S[live], c["K"][live], T[live], c["r"][live],
+                                          np.maximum(c["sigma"][live] + dvol, 1e-8), self.book.is_call[live])["price"]
+            out[k] = np.bincount(self.group, weights=(price - self.base_price) * qty, minlength=out.shape[1])
+        return out
+
+    def pnl(self, shocks, total=True):
+        """
+        Scenario P&L: Taylor approximation, with full repricing for shocks
+        outside the tolerances.
+
+        :param shocks: (n, 3) array of (spot return, vol change, dt)
+        :param total:  Add a 'total' column summed over underlyings
+        :return:       DataFrame indexed by shock
+        """
+        shocks = np.atleast_2d(np.asarray(shocks, float))
+        out = self.approx_pnl(shocks)
+        beyond = (np.abs(shocks) > self.limits).any(axis=1)
+        if beyond.any():
+            out[beyond] = self.full_pnl(shocks[beyond])
+        df = pd.DataFrame(out, columns=self.labels)
+        df.index = pd.MultiIndex.from_arrays(shocks.T, names=["spot_return", "vol_change", "dt"])
+        df["repriced"] = beyond
+        if total:
+            df["total"] = out.sum(axis=1)
+        return df
+
+    def check(self, shocks, sample=None, seed=0):
+        """
+        Compare the Taylor approximation with full repricing.
+
+        :param sample: Number of shocks to check (random subset); None checks all
+        :return:       dict with max/mean absolute error and the worst shock
+        """
+        shocks = np.atleast_2d(np.asarray(shocks, float))
+        if sample is not None and sample < shocks.shape[0]:
+            shocks = shocks[np.random.default_rng(seed).choice(shocks.shape[0], sample, replace=False)]
+        approx = self.approx_pnl(shocks).sum(axis=1)
+        exact = self.full_pnl(shocks).sum(axis=1)
+        err = np.abs(approx - exact)
+        worst = int(np.argmax(err))
+        return {
+            "max_abs_error": float(err[worst]),
+            "mean_abs_error": float(err.mean()),
+            "worst_shock": tuple(shocks[worst]),
+            "worst_exact_pnl": float(exact[worst]),
+        }
@@ -0,0 +1,347 @@
+import math
+import numpy as np
+import instrument
+from scipy.optimize import brentq
+from bs_chain import GREEKS, bs_price, is_call_mask, price_chain
+
+"""
+
+Root finding for inverting Option metrics (break-even spot, strike, vol, ...).
+
+Sample code:
+
+o = Option(100, 100, 1, .05, .2)
+find_inverse(o, o.price, 12, 'S')                       # Brent, bracket found automatically
+find_inverse(o, 'price', 12, 'sigma', method='newton')  # Newton with vega
+find_inverse_many(o, 'price', [8, 10, 12], 'S')         # many targets at once
+
+"""
+
+# open intervals each parameter can live in
+PARAM_DOMAINS = {
+    "S": (0.0, math.inf),
+    "K": (0.0, math.inf),
+    "T": (0.0, math.inf),
+    "sigma": (0.0, math.inf),
+    "r": (-math.inf, math.inf),
+}
+
+# d(metric)/d(param) from the Option's own Greeks
+ANALYTIC_DERIVATIVES = {
+    ("price", "S"): lambda o: o.delta(),
+    ("price", "sigma"): lambda o: o.vega(),
+    ("price", "r"): lambda o: o.rho(),
+    ("price", "T"): lambda o: -o.theta(),
+    ("delta", "S"): lambda o: o.gamma(),
+}
+
+
+class InverseResult:
+    """
+    Outcome of a solve. For find_inverse_many every field except method is an array.
+    """
+    __slots__ = ("root", "value", "iterations", "function_calls", "converged", "method")
+
+    def __init__(self, root, value, iterations, function_calls, converged, method):
+        self.root = root
+        self.value = value
+        self.iterations = iterations
+        self.function_calls = function_calls
+        self.converged = converged
+        self.method = method
+
+    def __repr__(self):
+        return (f"InverseResult(root={self.root}, value={self.value}, iterations={self.iterations}, "
+                f"function_calls={self.function_calls}, converged={self.converged}, method={self.method!r})")
+
+
+def find_bracket(f, x0, lower=-math.inf, upper=math.inf, step=None, grow=2.0, max_expand=60):
+    """
+    Expand outward from x0 until f changes sign.
+
+    Steps grow geometrically; toward a finite limit the bracket end moves
+    halfway to the limit instead, so it never lands on it.
+
+    :return: (a, b, f(a), f(b), function_calls)
+    :raises ValueError: if no sign change is found
+    """
+    width = step if step is not None else max(abs(x0) * 0.1, 1e-2)
+
+    def down(x, w):
+        return x - w if x - w > lower else (x + lower) / 2
+
+    def up(x, w):
+        return x + w if x + w < upper else (x + upper) / 2
+
+    a, b = down(x0, width), up(x0, width)
+    fa, fb = f(a), f(b)
+    calls = 2
+    for _ in range(max_expand):
+        if np.sign(fa) * np.sign(fb) <= 0 and np.isfinite(fa) and np.isfinite(fb):
+            return a, b, fa, fb, calls
+        width *= grow
+        # move the end whose value is closer to zero, or whichever is finite
+        if not np.isfinite(fb) or (np.isfinite(fa) and abs(fa) < abs(fb)):
+            a = down(a, width)
+            fa = f(a)
+        else:
+            b = up(b, width)
+            fb = f(b)
+        calls += 1
+    raise ValueError(f"No sign change found around {x0} within ({lower}, {upper})")
+
+
+def illinois(f, a, b, fa=None, fb=None, xtol=1e-12, ftol=1e-12, max_iter=200):
+    """
+    Illinois (modified regula falsi) on a sign-changing bracket [a, b].
+
+    :return: (root, iterations, function_calls, converged)
+    """
+    fa = f(a) if fa is None else fa
+    fb = f(b) if fb is None else fb
+    calls = 0
+    side = 0
+    c = a
+    for i in range(1, max_iter + 1):
+        c = (a * fb - b * fa) / (fb - fa)
+        fc = f(c)
+        calls += 1
+        if abs(fc) < ftol or abs(b - a) < xtol * (1 + abs(c)):
+            return c, i, calls, True
+        if fc * fb > 0:
+            b, fb = c, fc
+            if side == -1:
+                fa /= 2
+            side = -1
+        else:
+            a, fa = c, fc
+            if side == 1:
+                fb /= 2
+            side = 1
+    return c, max_iter, calls, False
+
+
+def newton(f, fprime, x0, a=None, b=None, xtol=1e-12, ftol=1e-12, max_iter=100):
+    """
+    Newton's method. With a bracket [a, b] any step leaving it falls back to bisection.
+
+    :return: (root, iterations, function_calls, converged)
+    """
+    x = x0
+    fa = f(a) if a is not None else None
+    calls = 1 if a is not None else 0
+    for i in range(1, max_iter + 1):
+        fx = f(x)
+        calls += 1
+        if abs(fx) < ftol:
+            return x, i, calls, True
+        if a is not None:
+            if np.sign(fx) == np.sign(fa):
+                a, fa = x, fx
+            else:
+                b = x
+        d = fprime(x)
+        step_ok = d != 0 and np.isfinite(d)
+        x_new = x - fx / d if step_ok else x
+        if a is not None and not (min(a, b) < x_new < max(a, b)):
+            x_new = (a + b) / 2
+        if abs(x_new - x) < xtol * (1 + abs(x)):
+            return x_new, i, calls, True
+        x = x_new
+    return x, max_iter, calls, False
+
+
+def _clip_bounds(change_param, lower_bound, upper_bound):
+    """
+    Intersect caller-supplied bracket ends with the parameter's domain. The
+    domains are open (S, K, T, sigma > 0), so an end on or past a finite edge
+    is moved just inside it.
+    """
+    lower, upper = PARAM_DOMAINS.get(change_param, (-math.inf, math.inf))
+    a, b = sorted((float(lower_bound), float(upper_bound)))
+    if a <= lower:
+        a = lower + 1e-12 * ((b if b < upper else lower + 1.0) - lower)
+    if b >= upper:
+        b = upper - 1e-12 * (upper - a)
+    if not a < b:
+        raise ValueError(f"bounds [{lower_bound}, {upper_bound}] do not overlap the domain "
+                         f"({lower}, {upper}) of {change_param}")
+    return a, b
+
+
+def _metric(o, func):
+    if isinstance(func, str):
+        return func, getattr(o, func)
+    return getattr(func, "__name__", None), func
+
+
+@instrument.probe
+def find_inverse(o, func, target: float, change_param: str, eps: float = 1e-10, lower_bound=None, upper_bound=None,
+                 max_iters=200, method="brent"):
+    """
+    Find the value of o.<change_param> at which func() equals target.
+
+    :param o:            Option (or anything with settable pricing attributes)
+    :param func:         Bound method of o (e.g. o.price) or its name ('price', 'delta', ...)
+    :param target:       Value func() should hit
+    :param change_param: Attribute to solve for ('S', 'K', 'T', 'r', 'sigma')
+    :param eps:          Tolerance on |func() - target| and on the bracket width
+    :param lower_bound:  Bracket ends, clipped to the parameter's domain; found automatically
+    :param upper_bound:  from the current value if omitted
+    :param max_iters:    Iteration cap
+    :param method:       'brent', 'illinois' or 'newton' (analytic Greek where available)
+    :return:             InverseResult; o.<change_param> is left at the root
+    """
+    name, fn = _metric(o, func)
+    start = getattr(o, change_param)
+    lower, upper = PARAM_DOMAINS.get(change_param, (-math.inf, math.inf))
+
+    def f(x):
+        setattr(o, change_param, x)
+        return fn() - target
+
+    calls = 0
+    fa = fb = None
+    if lower_bound is None or upper_bound is None:
+        a, b, fa, fb, calls = find_bracket(f, start, lower, upper)
+    else:
+        a, b = _clip_bounds(change_param, lower_bound, upper_bound)
+
+    if method == "brent":
+        root, info = brentq(f, a, b, xtol=eps, maxiter=max_iters, full_output=True, disp=False)
+        iterations, fcalls, converged = info.iterations, info.function_calls, info.converged
+    elif method == "illinois":
+        root, iterations, fcalls, converged = illinois(f, a, b, fa, fb, xtol=eps, ftol=eps, max_iter=max_iters)
+    elif method == "newton":
+        analytic = ANALYTIC_DERIVATIVES.get((name, change_param))
+        if analytic is not None:
+            def fprime(x):
+                setattr(o, change_param, x)
+                return analytic(o)
+        else:
+            def fprime(x):
+                h = 1e-6 * max(abs(x), 1.0)
+                return (f(x + h) - f(x - h)) / (2 * h)
+        x0 = start if min(a, b) < start < max(a, b) else (a + b) / 2
+        root, iterations, fcalls, converged = newton(f, fprime, x0, a, b, xtol=eps, ftol=eps, max_iter=max_iters)
+    else:
+        raise ValueError("method must be 'brent', 'illinois' or 'newton'")
+
+    value = f(root) + target
+    if instrument.enabled():
+        instrument.record_solver(f"solvers.find_inverse[{method}]", 1, iterations,
+                                 nonconverged=int(not converged),
+                                 failures=() if converged else [{"param": change_param, "target": target, "root": root}])
+    return InverseResult(root, value, iterations, calls + fcalls, converged, method)
+
+
+def _bracket_many(f, x0, lower, upper, grow=2.0, max_expand=60):
+    """
+    Vectorized find_bracket: every element expands independently until its sign changes.
+    """
+    width = np.maximum(np.abs(x0) * 0.1, 1e-2)
+
+    def down(x, w):
+        return np.where(x - w > lower, x - w, (x + lower) / 2)
+
+    def up(x, w):
+        return np.where(x + w < upper, x + w, (x + upper) / 2)
+
+    a, b = down(x0, width), up(x0, width)
+    fa, fb = f(a), f(b)
+    calls = np.full(x0.shape, 2)
+    for _ in range(max_expand):
+        found = (np.sign(fa) * np.sign(fb) <= 0) & np.isfinite(fa) & np.isfinite(fb)
+        if found.all():
+            break
+        width = width * grow
+        move_a = ~found & (~np.isfinite(fb) | (np.isfinite(fa) & (np.abs(fa) < np.abs(fb))))
+        move_b = ~found & ~move_a
+        a = np.where(move_a, down(a, width), a)
+        b = np.where(move_b, up(b, width), b)
+        fa, fb = f(a), f(b)
+        calls += ~found
+    found = (np.sign(fa) * np.sign(fb) <= 0) & np.isfinite(fa) & np.isfinite(fb)
+    return a, b, fa, fb, found, calls
+
+
+@instrument.probe
+def find_inverse_many(o, metric: str, targets, change_param: str, lower_bound=None, upper_bound=None, eps=1e-10,
+                      max_iters=200):
+    """
+    Vectorized find_inverse: solve for change_param at many targets together with
+    Illinois steps over arrays, pricing through bs_chain instead of the Option.
+
+    o is only read, never modified.
+
+    :param metric: One of bs_chain.GREEKS
+    :return:       InverseResult of arrays; root is NaN where no bracket was found
+    """
+    if metric not in GREEKS:
+        raise ValueError(f"metric must be one of {GREEKS}")
+    targets = np.atleast_1d(np.asarray(targets, dtype=float))
+    n = targets.shape[0]
+    params = {p: np.full(n, float(getattr(o, p))) for p in ("S", "K", "T", "r", "sigma")}
+    is_call = is_call_mask(o.option_type, n)
+    lower, upper = PARAM_DOMAINS.get(change_param, (-math.inf, math.inf))
+
+    def evaluate(x, rows=slice(None)):
+        args = {p: v[rows] for p, v in params.items()}
+        args[change_param] = x
+        if metric == "price":
+            out = bs_price(args["S"], args["K"], args["T"], args["r"], args["sigma"], is_call[rows])
+        else:
+            out = price_chain(args["S"], args["K"], args["T"], args["r"], args["sigma"], is_call[rows])[metric]
+        return out - targets[rows]
+
+    if lower_bound is None or upper_bound is None:
+        with np.errstate(all="ignore"):
+            a, b, fa, fb, found, calls = _bracket_many(evaluate, params[change_param], lower, upper)
+    else:
+        a, b = (np.full(n, x) for x in _clip_bounds(change_param, lower_bound, upper_bound))
+        fa, fb = evaluate(a), evaluate(b)
+        found = np.sign(fa) * np.sign(fb) <= 0
+        calls = np.full(n, 2)
+
+    root = np.full(n, np.nan)
+    iterations = np.zeros(n, dtype=int)
+    converged = np.zeros(n, dtype=bool)
+    side = np.zeros(n, dtype=int)
+    active = np.flatnonzero(found)
+    a, b, fa, fb, side = a[active], b[active], fa[active], fb[active], side[active]
+
+    for i in range(1, max_iters + 1):
+        if active.shape[0] == 0:
+            break
+        with np.errstate(all="ignore"):
+            c = (a * fb - b * fa) / (fb - fa)
+            c = np.where(np.isfinite(c), c, (a + b) / 2)
+            fc = evaluate(c, active)
+        iterations[active] = i
+        done = (np.abs(fc) < eps) | (np.abs(b - a) < eps * (1 + np.abs(c)))
+        root[active[done]] = c[done]
+        converged[active[done]] = True
+
+        same_b = fc * fb > 0
+        fa = np.where(same_b & (side == -1), fa / 2, fa)
+        fb = np.where(~same_b & (side == 1), fb / 2, fb)
+        b, fb = np.where(same_b, c, b), np.where(same_b, fc, fb)
+        a, fa = np.where(same_b, a, c), np.where(same_b, fa, fc)
+        side = np.where(same_b, -1, 1)
+
+        keep = ~done
+        root[active[keep]] = c[keep]
+        active, a, b, fa, fb, side = active[keep], a[keep], b[keep], fa[keep], fb[keep], side[keep]
+
+    value = np.full(n, np.nan)
+    ok = np.isfinite(root)
+    with np.errstate(all="ignore"):
+        full = evaluate(np.where(ok, root, params[change_param]))
+    value[ok] = full[ok] + targets[ok]
+    if instrument.enabled():
+        missed = found & ~converged
+        instrument.record_solver("solvers.find_inverse_many", int(found.sum()), int(iterations.sum()),
+                                 int(iterations.max(initial=0)), nonconverged=int(missed.sum()),
+                                 invalid=int((~found).sum()),
+                                 failures=[{"param": change_param, "target": t} for t in targets[missed][:10].tolist()])
+    return InverseResult(root, value, iterations, calls + iterations, converged, "illinois")
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# the programs import each other as top-level modules (import normal, from bs_chain import ...)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,11 @@
+import numpy as np
+from bs_chain import bs_price, price_chain
+
+
+def test_deep_out_of_the_money_puts_keep_relative_accuracy():
+    strikes = np.array([40.0, 50.0, 60.0])
+    out = price_chain(100.0, strikes, 0.25, 0.05, 0.1, "put")
+    scalar = bs_price(100.0, strikes, 0.25, 0.05, 0.1, False)
+    assert (out["price"] > 0).all() and (out["price"] < 1e-15).any()
+    np.testing.assert_allclose(out["price"], scalar, rtol=1e-12)
+    assert (out["rho"] < 0).all() and (out["theta"] < 0).all()
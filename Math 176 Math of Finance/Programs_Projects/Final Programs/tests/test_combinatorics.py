@@ -0,0 +1,21 @@
+import pytest
+from combinatorics import score_tail
+
+SCORES = (4, 5, 0)
+
+
+@pytest.mark.parametrize("n, threshold", [(100, 310), (2000, 6000), (2000, 6800), (500, 2300), (2000, 9000)])
+def test_float_tail_relative_to_exact(n, threshold):
+    exact = float(score_tail(n, SCORES, threshold))
+    approx = score_tail(n, SCORES, threshold, exact=False)
+    assert approx == pytest.approx(exact, rel=1e-10, abs=0)
+
+
+def test_float_tail_weighted_deep_tail():
+    exact = float(score_tail(2000, SCORES, 6800, weights=(1, 2, 3)))
+    assert score_tail(2000, SCORES, 6800, weights=(1, 2, 3), exact=False) == pytest.approx(exact, rel=1e-10, abs=0)
+
+
+def test_float_tail_bounds():
+    assert score_tail(2000, SCORES, 0, exact=False) == 1.0
+    assert score_tail(2000, SCORES, 10_001, exact=False) == 0.0
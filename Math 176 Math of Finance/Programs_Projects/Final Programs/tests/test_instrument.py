@@ -0,0 +1,24 @@
+import bs_chain
+import instrument
+import option_book
+from option_book import OptionBook
+
+
+def book():
+    return OptionBook(S=[100, 100, 50], K=[95, 105, 50], T=.5, r=.03, sigma=[.2, .25, .4],
+                      option_type=['call', 'put', 'call'])
+
+
+def test_imported_entry_points_are_recorded():
+    original = bs_chain.price_chain
+    instrument.reset()
+    with instrument.instrumented():
+        for _ in range(5):
+            book().price()
+        calls = instrument.snapshot()["calls"]
+    assert calls["bs_chain.price_chain"]["count"] == 5
+    # disable() puts the original back in the importing module too
+    assert option_book.price_chain is original
+    instrument.reset()
+    book().price()
+    assert instrument.snapshot()["calls"] == {}
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from bs_chain import bs_price, price_chain
+from lattice import lattice_price
+
+S, K, T, R, SIGMA = 100.0, 100.0, 1.0, 0.05, 0.2
+
+
+@pytest.fixture(scope="module")
+def american_put():
+    return lattice_price(S, K, T, R, SIGMA, "put", True, 20001, "lr")[0]
+
+
+@pytest.mark.parametrize("steps", [100, 101, 150, 151])
+@pytest.mark.parametrize("method", ["crr", "lr"])
+def test_richardson_european_odd_and_even_steps(steps, method):
+    exact = float(bs_price(S, K, T, R, SIGMA, False))
+    plain = lattice_price(S, K, T, R, SIGMA, "put", False, steps, method)[0] - exact
+    extrapolated = lattice_price(S, K, T, R, SIGMA, "put", False, steps, method, richardson=True)[0] - exact
+    assert abs(extrapolated) < abs(plain) / 10
+    assert abs(extrapolated) < 2e-5
+
+
+@pytest.mark.parametrize("steps", [100, 101, 150, 151])
+@pytest.mark.parametrize("method", ["crr", "lr"])
+def test_richardson_american_odd_and_even_steps(steps, method, american_put):
+    plain = lattice_price(S, K, T, R, SIGMA, "put", True, steps, method)[0] - american_put
+    extrapolated = lattice_price(S, K, T, R, SIGMA, "put", True, steps, method, richardson=True)[0] - american_put
+    assert abs(extrapolated) < abs(plain)
+    assert abs(extrapolated) < 2e-4
+
+
+@pytest.mark.parametrize("kind", ["put", "call"])
+@pytest.mark.parametrize("method", ["crr", "lr"])
+def test_european_greeks_match_black_scholes(kind, method):
+    strikes = np.array([70.0, 90.0, 100.0, 110.0, 130.0])
+    exact = price_chain(S, strikes, T, R, SIGMA, kind)
+    tree = lattice_price(S, strikes, T, R, SIGMA, kind, False, 501, method, greeks=True)
+    np.testing.assert_allclose(tree["delta"], exact["delta"], atol=1e-3)
+    np.testing.assert_allclose(tree["gamma"], exact["gamma"], atol=1e-4)
+    np.testing.assert_allclose(tree["theta"], exact["theta"], atol=1e-2)
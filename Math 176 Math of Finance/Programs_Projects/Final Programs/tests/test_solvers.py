@@ -0,0 +1,25 @@
+import pytest
+from midterm2 import Option, find_inverse
+from solvers import find_inverse_many
+
+
+def test_legacy_call_with_bounds_outside_the_domain():
+    # the old midterm2 signature: eps=.0001, bounds -300..300, 30 iterations
+    o = Option(100, 100, 1, .05, .2)
+    result = find_inverse(o, o.price, 12, 'S', .0001, -300, 300, 30)
+    assert result.converged
+    assert o.S == result.root
+    assert o.price() == pytest.approx(12, abs=1e-3)
+
+
+def test_vectorized_bounds_are_clipped_too():
+    o = Option(100, 100, 1, .05, .2)
+    result = find_inverse_many(o, "price", [12, 15], "S", -300, 300)
+    assert result.converged.all()
+    assert result.value == pytest.approx([12, 15], abs=1e-8)
+
+
+def test_bounds_outside_the_domain_are_rejected():
+    o = Option(100, 100, 1, .05, .2)
+    with pytest.raises(ValueError, match="domain"):
+        find_inverse(o, o.price, 12, 'sigma', 1e-10, -5, -1)
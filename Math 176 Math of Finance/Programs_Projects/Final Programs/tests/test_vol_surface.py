@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+from bs_chain import bs_price
+from vol_surface import VolSurface, svi_total_variance
+
+S, R = 100.0, 0.02
+# raw SVI slices (a, b, rho, m, s); the short expiries quote strikes far into both wings
+SLICES = {
+    0.05: (0.0008, 0.02, -0.4, 0.0, 0.08),
+    0.1: (0.0015, 0.03, -0.4, 0.0, 0.1),
+    0.5: (0.008, 0.08, -0.4, 0.02, 0.15),
+    1.0: (0.016, 0.12, -0.4, 0.03, 0.2),
+}
+
+
+def true_vol(K, T):
+    k = np.log(K / (S * np.exp(R * T)))
+    return np.sqrt(svi_total_variance(k, *SLICES[T]) / T)
+
+
+def chain():
+    strikes = np.arange(30.0, 300.0, 5.0)
+    K, T, premium, kind = [], [], [], []
+    for t in SLICES:
+        for option in ("call", "put"):
+            K.append(strikes)
+            T.append(np.full(strikes.shape, t))
+            premium.append(bs_price(S, strikes, t, R, true_vol(strikes, t), option == "call"))
+            kind.append(np.full(strikes.shape, option))
+    return [np.concatenate(x) for x in (K, T, premium, kind)]
+
+
+@pytest.mark.parametrize("method, tolerance", [("svi", 2e-4), ("spline", 5e-4)])
+def test_fit_error_per_slice_with_deep_wing_quotes(method, tolerance):
+    surf = VolSurface(S, R, method=method).fit(*chain())
+    strikes = np.arange(80.0, 125.0, 1.0)
+    for T in SLICES:
+        err = np.abs(surf.sigma(strikes, np.full(strikes.shape, T)) - true_vol(strikes, T)).max()
+        assert err < tolerance, f"T={T}: max vol error {err:.2e}"
+
+
+def test_unresolvable_wing_quotes_are_not_fitted():
+    surf = VolSurface(S, R).fit(*chain())
+    q = surf.quotes
+    usable = q["usable"].astype(bool)
+    assert (~usable & (q["T"] <= 0.1)).any()
+    assert usable.sum() >= 3 * len(SLICES)
+    # every quote that is fitted carries an accurate implied vol
+    err = np.abs(q.loc[usable, "iv"] - [true_vol(K, T) for K, T in zip(q.loc[usable, "K"], q.loc[usable, "T"])])
+    assert err.max() < 1e-6
+
+
+@pytest.mark.parametrize("method", ["svi", "spline"])
+def test_update_quotes_builds_surface_from_empty(method):
+    K, T, premium, kind = chain()
+    surf = VolSurface(S, R, method=method)
+    assert surf.quotes["iv"].dtype == float
+    for t in SLICES:
+        rows = T == t
+        surf.update_quotes(K[rows], T[rows], premium[rows], kind[rows])
+    assert surf.quotes["iv"].dtype == float
+    fitted = VolSurface(S, R, method=method).fit(K, T, premium, kind)
+    strikes = np.arange(80.0, 125.0, 1.0)
+    for t in SLICES:
+        np.testing.assert_allclose(surf.sigma(strikes, np.full(strikes.shape, t)),
+                                   fitted.sigma(strikes, np.full(strikes.shape, t)), atol=1e-4)
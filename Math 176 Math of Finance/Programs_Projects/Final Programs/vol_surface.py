@@ -0,0 +1,198 @@
+import numpy as np
+import pandas as pd
+from scipy.interpolate import UnivariateSpline
+from scipy.optimize import least_squares
+from bs_chain import bs_vega
+from implied_vol import implied_vol_chain
+
+"""
+
+Implied volatility surface fitted in total-variance space.
+
+Quotes are implied with the batch solver, each expiry gets an SVI (or
+smoothing spline) slice in log-moneyness k = log(K / F), and the fitted
+total variance w = sigma^2 T is sampled on a fixed k grid. Lookups only
+interpolate that grid, so sigma(K, T) on large arrays costs a few vector ops.
+
+Only quotes whose vol is pinned down enter a fit: the solver converged, the
+premium is at least min_premium, and rounding the premium moves the implied
+vol by less than iv_noise (eps * premium / vega), which drops deep
+in-the-money quotes whose time value is lost in the price.
+
+Sample code:
+
+surf = VolSurface(S=100, r=.03)
+surf.fit(K, T, premium, kind)
+surf.sigma([95, 100, 105], [.25, .25, .5])
+surf.update_quotes(K_changed, T_changed, premium_changed, kind_changed)   # refits only those expiries
+
+"""
+
+
+def svi_total_variance(k, a, b, rho, m, s):
+    """
+    Raw SVI: w(k) = a + b (rho (k - m) + sqrt((k - m)^2 + s^2)).
+    """
+    return a + b * (rho * (k - m) + np.sqrt((k - m) ** 2 + s ** 2))
+
+
+def fit_svi(k, w, weights=None, x0=None):
+    """
+    Least-squares raw SVI fit to one expiry's total variances.
+
+    Bounds keep b >= 0, |rho| < 1, s > 0 and a >= 0 is relaxed to
+    a + b s sqrt(1 - rho^2) >= 0 through a penalty, which keeps w >= 0 everywhere.
+
+    :param x0: Starting parameters (e.g. the previous fit, for warm starts)
+    :return:   (a, b, rho, m, s)
+    """
+    weights = np.ones_like(w) if weights is None else weights
+    if x0 is None:
+        x0 = (max(w.min(), 1e-6), 0.1, -0.3, 0.0, 0.1)
+
+    def residuals(p):
+        a, b, rho, m, s = p
+        floor = a + b * s * np.sqrt(1 - rho ** 2)
+        return np.append(weights * (svi_total_variance(k, *p) - w), 10 * min(floor, 0.0))
+
+    lower = (-1.0, 0.0, -0.999, -2.0, 1e-4)
+    upper = (np.inf, np.inf, 0.999, 2.0, 5.0)
+    x0 = np.clip(x0, np.add(lower, 1e-9), np.subtract(upper, 1e-9))
+    return tuple(least_squares(residuals, x0, bounds=(lower, upper), method="trf").x)
+
+
+class VolSurface:
+    def __init__(self, S, r, method="svi", k_range=(-1.5, 1.5), k_points=301, min_premium=0.0, iv_noise=1e-6):
+        """
+        :param S:           Spot price
+        :param r:           Risk-free rate (forward F = S e^(rT))
+        :param method:      'svi' or 'spline' per-expiry fit
+        :param k_range:     Log-moneyness range of the lookup grid (flat beyond)
+        :param k_points:    Grid resolution in k
+        :param min_premium: Quotes cheaper than this are kept but not fitted
+        :param iv_noise:    Largest vol error from premium rounding a fitted quote may carry
+        """
+        self.S = S
+        self.r = r
+        self.method = method
+        self.min_premium = min_premium
+        self.iv_noise = iv_noise
+        self.k_grid = np.linspace(k_range[0], k_range[1], k_points)
+        self.quotes = pd.DataFrame({"K": [], "T": [], "premium": [], "kind": pd.Series([], dtype=object), "iv": [],
+                                    "converged": pd.Series([], dtype=bool), "vega": [],
+                                    "usable": pd.Series([], dtype=bool)})
+        self.params = {}         # T -> fitted slice (SVI params or spline)
+        self.raw_w = {}          # T -> fitted total variance on k_grid, before calendar fix
+        self.expiries = np.empty(0)
+        self.w_grid = np.empty((0, k_points))
+
+    def log_moneyness(self, K, T):
+        return np.log(np.asarray(K, float) / (self.S * np.exp(self.r * np.asarray(T, float))))
+
+    def fit(self, K, T, premium, kind="call"):
+        """
+        Replace all quotes and fit every expiry.
+        """
+        self.quotes = self._implied(K, T, premium, kind)
+        self.params, self.raw_w = {}, {}
+        self._refit(self.quotes["T"].unique())
+        return self
+
+    def update_quotes(self, K, T, premium, kind="call"):
+        """
+        Insert or overwrite quotes keyed by (K, T, kind) and refit only the
+        expiries they touch, warm-started from the previous parameters.
+        """
+        new = self._implied(K, T, premium, kind)
+        keys = ["K", "T", "kind"]
+        if self.quotes.empty:
+            self.quotes = new
+        else:
+            merged = pd.concat([self.quotes, new]).drop_duplicates(subset=keys, keep="last")
+            self.quotes = merged.reset_index(drop=True)
+        self._refit(new["T"].unique())
+        return self
+
+    def _implied(self, K, T, premium, kind):
+        K, T, premium = (np.atleast_1d(np.asarray(x, float)) for x in (K, T, premium))
+        K, T, premium = np.broadcast_arrays(K, T, premium)
+        kind = np.broadcast_to(np.asarray(kind), K.shape)
+        iv, converged = implied_vol_chain(premium, self.S, K, T, self.r, kind)
+        with np.errstate(invalid="ignore"):
+            vega = bs_vega(self.S, K, T, self.r, iv)
+            noise = np.finfo(float).eps * premium / vega
+        usable = converged & (premium >= self.min_premium) & (noise < self.iv_noise)
+        return pd.DataFrame({"K": K, "T": T, "premium": premium, "kind": kind, "iv": iv,
+                             "converged": converged, "vega": vega, "usable": usable})
+
+    def _fit_slice(self, T, group):
+        group = group[group["usable"].astype(bool)]
+        k = self.log_moneyness(group["K"].to_numpy(), T)
+        w = group["iv"].to_numpy() ** 2 * T
+        order = np.argsort(k)
+        k, w = k[order], w[order]
+        if self.method == "svi":
+            params = fit_svi(k, w, x0=self.params.get(T))
+            return params, svi_total_variance(self.k_grid, *params)
+        # average duplicate strikes (call and put at the same K) before smoothing
+        k, inverse = np.unique(k, return_inverse=True)
+        w = np.bincount(inverse, weights=w) / np.bincount(inverse)
+        # smoothing budget relative to the slice's level, so short expiries (small w) fit as tightly
+        spline = UnivariateSpline(k, w, k=min(3, k.shape[0] - 1), s=k.shape[0] * (1e-4 * w.mean()) ** 2)
+        grid_k = np.clip(self.k_grid, k[0], k[-1])
+        return spline, spline(grid_k)
+
+    def _refit(self, expiries):
+        for T in expiries:
+            group = self.quotes[self.quotes["T"] == T]
+            if group["usable"].astype(bool).sum() < 3:
+                self.params.pop(T, None)
+                self.raw_w.pop(T, None)
+                continue
+            self.params[T], self.raw_w[T] = self._fit_slice(T, group)
+        self._rebuild_grid()
+
+    def _rebuild_grid(self):
+        """
+        Stack slices by expiry and enforce non-decreasing total variance in T
+        (no calendar arbitrage) with a running maximum.
+        """
+        self.expiries = np.array(sorted(self.raw_w))
+        if self.expiries.shape[0] == 0:
+            self.w_grid = np.empty((0, self.k_grid.shape[0]))
+            return
+        w = np.vstack([np.maximum(self.raw_w[T], 0) for T in self.expiries])
+        self.w_grid = np.maximum.accumulate(w, axis=0)
+
+    def total_variance(self, K, T):
+        """
+        Total implied variance at arbitrary (K, T): linear in k on the grid,
+        linear in T between expiries, constant vol outside the quoted expiries.
+        """
+        if self.expiries.shape[0] == 0:
+            raise ValueError("surface has no fitted expiries")
+        K, T = np.broadcast_arrays(np.asarray(K, float), np.asarray(T, float))
+        k = self.log_moneyness(K, T)
+        g = self.k_grid
+        pos = np.clip((k - g[0]) / (g[1] - g[0]), 0, g.shape[0] - 1)
+        i = np.minimum(pos.astype(np.intp), g.shape[0] - 2)
+        frac = pos - i
+
+        def along_k(row):
+            return (1 - frac) * self.w_grid[row, i] + frac * self.w_grid[row, i + 1]
+
+        e = self.expiries
+        if e.shape[0] == 1:
+            return along_k(np.zeros_like(i)) * T / e[0]
+        j = np.clip(np.searchsorted(e, T) - 1, 0, e.shape[0] - 2)
+        w_lo, w_hi = along_k(j), along_k(j + 1)
+        t = (T - e[j]) / (e[j + 1] - e[j])
+        inside = w_lo + np.clip(t, 0, 1) * (w_hi - w_lo)
+        return np.where(T < e[0], w_lo * T / e[0], np.where(T > e[-1], w_hi * T / e[-1], inside))
+
+    def sigma(self, K, T):
+        """
+        Implied volatility at (K, T), vectorized.
+        """
+        T = np.asarray(T, float)
+        return np.sqrt(self.total_variance(K, T) / T)
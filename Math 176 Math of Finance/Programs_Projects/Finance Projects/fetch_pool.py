@@ -0,0 +1,184 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+"""
+
+Concurrent fetch layer: bounded thread pool, per-source rate limits, retries
+with exponential backoff, and de-duplication of identical requests.
+
+Sample code:
+
+pool = FetchPool(max_workers=16, rate_limits={'yfinance': 5})
+chains = fetch_option_chains(pool, YFinanceBackend(), ['SPY', 'QQQ'])
+chains['SPY']['2025-06-20'].calls
+
+history = fetch_history(pool, YFinanceBackend(), ['SPY', 'QQQ'], '2024-01-01', '2025-01-01')
+
+"""
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket: at most `rate` acquisitions per second on
+    average, with bursts of up to `burst`.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst if burst is not None else max(rate, 1))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class FetchPool:
+    def __init__(self, max_workers=8, rate_limits=None, retries=3, backoff=0.5, max_backoff=8.0, retry_on=(Exception,)):
+        """
+        :param max_workers: Thread pool size (upper bound on requests in flight)
+        :param rate_limits: {source: requests per second}; sources not listed are unlimited
+        :param retries:     Extra attempts after the first failure
+        :param backoff:     First retry delay in seconds, doubled each attempt (with jitter)
+        :param max_backoff: Cap on a single retry delay
+        :param retry_on:    Exception types worth retrying
+        """
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.limiters = {src: RateLimiter(rate) for src, rate in (rate_limits or {}).items()}
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retry_on = retry_on
+        self.futures = {}
+        self.lock = threading.Lock()
+        self.stats = {"submitted": 0, "deduplicated": 0, "calls": 0, "retries": 0, "failures": 0}
+
+    def _count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def _run(self, source, fn, args, kwargs):
+        limiter = self.limiters.get(source)
+        for attempt in range(self.retries + 1):
+            if limiter is not None:
+                limiter.acquire()
+            self._count("calls")
+            try:
+                return fn(*args, **kwargs)
+            except self.retry_on:
+                if attempt == self.retries:
+                    self._count("failures")
+                    raise
+                self._count("retries")
+                delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+                time.sleep(delay * (0.5 + random.random() / 2))
+
+    def submit(self, source, key, fn, *args, cache=True, **kwargs):
+        """
+        Schedule fn(*args, **kwargs) unless a request with the same (source, key)
+        was already submitted, in which case the existing Future is returned.
+        Failed requests are forgotten so a later submit can try again.
+
+        With cache=False a request is only shared while it is in flight.
+        """
+        with self.lock:
+            existing = self.futures.get((source, key))
+            if existing is not None and not (existing.done() and existing.exception() is not None):
+                self.stats["deduplicated"] += 1
+                return existing
+            self.stats["submitted"] += 1
+            future = self.executor.submit(self._run, source, fn, args, kwargs)
+            self.futures[(source, key)] = future
+        if not cache:
+            future.add_done_callback(lambda f: self._drop((source, key), f))
+        return future
+
+    def _drop(self, key, future):
+        with self.lock:
+            if self.futures.get(key) is future:
+                del self.futures[key]
+
+    def forget(self, source=None):
+        """
+        Drop remembered results (for one source or all) so the next submit refetches.
+        """
+        with self.lock:
+            if source is None:
+                self.futures.clear()
+            else:
+                self.futures = {k: f for k, f in self.futures.items() if k[0] != source}
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+
+class YFinanceBackend:
+    """
+    yfinance behind the interface the fetch helpers expect. Any object with
+    the same three methods (e.g. a fake talking to a local server) can replace it.
+    """
+    source = "yfinance"
+
+    def history(self, ticker, start, end, interval="1d"):
+        from market_store import yfinance_fetcher
+        return yfinance_fetcher(ticker, start, end, interval)
+
+    def expirations(self, ticker):
+        import yfinance as yf
+        return tuple(yf.Ticker(ticker).options)
+
+    def option_chain(self, ticker, expiry):
+        """
+        Calls and puts for one expiry from a single request.
+        """
+        import yfinance as yf
+        return yf.Ticker(ticker).option_chain(expiry)
+
+
+def fetch_history(pool: FetchPool, backend, tickers, start, end, interval="1d"):
+    """
+    Download price history for many tickers in parallel.
+
+    :return: {ticker: DataFrame}
+    """
+    futures = {t: pool.submit(backend.source, ("history", t, start, end, interval), backend.history, t, start, end,
+                              interval) for t in dict.fromkeys(tickers)}
+    return {t: f.result() for t, f in futures.items()}
+
+
+def fetch_option_chains(pool: FetchPool, backend, tickers, expiries=None):
+    """
+    Pull the chain for every expiry of every ticker, each (ticker, expiry)
+    exactly once, with all requests in flight together.
+
+    :param expiries: Optional {ticker: [expiry, ...]}; listed from the backend when omitted
+    :return:         {ticker: {expiry: chain}} where chain is whatever the backend returns
+                     (for yfinance a namedtuple with .calls and .puts)
+    """
+    tickers = list(dict.fromkeys(tickers))
+    if expiries is None:
+        listing = {t: pool.submit(backend.source, ("expirations", t), backend.expirations, t) for t in tickers}
+        expiries = {t: f.result() for t, f in listing.items()}
+    futures = {
+        t: {e: pool.submit(backend.source, ("chain", t, e), backend.option_chain, t, e) for e in expiries[t]}
+        for t in tickers
+    }
+    return {t: {e: f.result() for e, f in per_expiry.items()} for t, per_expiry in futures.items()}
@@ -0,0 +1,323 @@
+import glob
+import json
+import os
+import numpy as np
+import pandas as pd
+
+"""
+
+Local on-disk OHLCV store with incremental updates.
+
+Each (ticker, interval) lives in its own directory, split into one partition
+per calendar year (per month for intraday intervals):
+
+    <root>/<TICKER>/<interval>/<period>.index.npy   int64 timestamps (ns since epoch, UTC)
+    <root>/<TICKER>/<interval>/<period>.values.npy  float64 (rows x columns), memory-mappable
+    <root>/<TICKER>/<interval>/meta.json            columns, first/last timestamp, rows per partition
+
+update() only asks the fetcher for bars after the last stored timestamp (or
+before the first one) and merges them in, rewriting only the partitions the
+new bars fall in, so re-running a universe costs the delta both on the wire
+and on disk. Stores written before partitioning (a single index.npy /
+values.npy) are still read and are converted on their next merge.
+
+Sample code:
+
+store = MarketStore('data')                                  # yfinance by default
+store.update('SPY', '2020-01-01', '2025-01-01', '1d')
+store.load('SPY', '1d')
+
+store = MarketStore('data', fetcher=CsvFetcher('fixtures'))  # offline stand-in
+
+"""
+
+
+def yfinance_fetcher(ticker, start, end, interval):
+    """
+    Default fetcher: yf.download for one ticker, flattened to plain OHLCV columns.
+    """
+    import yfinance as yf
+
+    df = yf.download(ticker, start=start, end=end, interval=interval, progress=False, auto_adjust=False)
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = df.columns.get_level_values(0)
+    return df
+
+
+class CsvFetcher:
+    """
+    File-backed fetcher: serves <directory>/<TICKER>.csv (first column is the
+    date index) sliced to [start, end). Used in place of yfinance for tests and
+    offline runs. Records every call so callers can check only deltas were requested.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.calls = []
+
+    def __call__(self, ticker, start, end, interval):
+        self.calls.append((ticker, start, end, interval))
+        df = pd.read_csv(os.path.join(self.directory, f"{ticker}.csv"), index_col=0, parse_dates=True)
+        lo = pd.Timestamp(start) if start is not None else df.index.min()
+        hi = pd.Timestamp(end) if end is not None else df.index.max() + pd.Timedelta(1, "ns")
+        return df[(df.index >= lo) & (df.index < hi)]
+
+
+def _to_ns(index) -> np.ndarray:
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_convert("UTC").tz_localize(None)
+    return index.as_unit("ns").asi8
+
+
+def _ts(value):
+    ts = pd.Timestamp(value)
+    return ts.tz_convert("UTC").tz_localize(None) if ts.tz is not None else ts
+
+
+def _period_unit(interval):
+    """
+    Partition length for an interval: a month for intraday bars, a year otherwise.
+    """
+    return "M" if interval.endswith(("m", "h")) and not interval.endswith("mo") else "Y"
+
+
+def _period_keys(index, unit):
+    """
+    Partition key ('2024' or '2024-03') of every ns timestamp.
+    """
+    return np.datetime_as_string(np.asarray(index).astype("datetime64[ns]").astype(f"datetime64[{unit}]"))
+
+
+def _split(index, unit):
+    """
+    (key, row slice) of each partition in a sorted ns index.
+    """
+    keys = _period_keys(index, unit)
+    cuts = np.concatenate([[0], np.flatnonzero(keys[1:] != keys[:-1]) + 1, [keys.shape[0]]])
+    return [(str(keys[a]), slice(int(a), int(b))) for a, b in zip(cuts[:-1], cuts[1:])]
+
+
+def _save(path, arr):
+    tmp = path[:-len(".npy")] + ".tmp.npy"
+    np.save(tmp, arr)
+    os.replace(tmp, path)
+
+
+class MarketStore:
+    def __init__(self, root, fetcher=yfinance_fetcher):
+        """
+        :param root:    Directory holding the store (created if missing)
+        :param fetcher: Callable (ticker, start, end, interval) -> DataFrame indexed by date
+        """
+        self.root = root
+        self.fetcher = fetcher
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, ticker, interval):
+        return os.path.join(self.root, ticker.upper(), interval)
+
+    def meta(self, ticker, interval):
+        """
+        Stored metadata, or None if nothing is stored yet.
+        """
+        meta_path = os.path.join(self.path(ticker, interval), "meta.json")
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path) as f:
+            return json.load(f)
+
+    def last_timestamp(self, ticker, interval):
+        meta = self.meta(ticker, interval)
+        return pd.Timestamp(meta["last"]) if meta else None
+
+    def _files(self, ticker, interval, key):
+        base = self.path(ticker, interval)
+        return os.path.join(base, f"{key}.index.npy"), os.path.join(base, f"{key}.values.npy")
+
+    def _write_meta(self, ticker, interval, meta):
+        base = self.path(ticker, interval)
+        tmp = os.path.join(base, "meta.tmp.json")
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(base, "meta.json"))
+
+    def arrays(self, ticker, interval, mmap=True, start=None, end=None):
+        """
+        Raw (index, values, columns) without building a DataFrame, read only
+        from the partitions overlapping [start, end). With mmap the values are
+        memory-mapped read-only (a single partition comes back as the map
+        itself; several are concatenated).
+        """
+        meta = self.meta(ticker, interval)
+        if meta is None:
+            raise KeyError(f"{ticker} {interval} is not in the store")
+        base = self.path(ticker, interval)
+        mode = "r" if mmap else None
+        if "partitions" not in meta:
+            index = np.load(os.path.join(base, "index.npy"), mmap_mode=mode)
+            values = np.load(os.path.join(base, "values.npy"), mmap_mode=mode)
+            return index, values, meta["columns"]
+
+        unit = _period_unit(interval)
+        lo = _ts(start).value if start is not None else None
+        hi = _ts(end).value if end is not None else None
+        parts = []
+        for key in meta["partitions"]:
+            first = np.datetime64(key, unit)
+            if hi is not None and first.astype("datetime64[ns]").astype(np.int64) >= hi:
+                continue
+            if lo is not None and (first + 1).astype("datetime64[ns]").astype(np.int64) <= lo:
+                continue
+            index_path, values_path = self._files(ticker, interval, key)
+            parts.append((np.load(index_path, mmap_mode=mode), np.load(values_path, mmap_mode=mode)))
+        if not parts:
+            return np.zeros(0, dtype=np.int64), np.zeros((0, len(meta["columns"]))), meta["columns"]
+        if len(parts) == 1:
+            return parts[0][0], parts[0][1], meta["columns"]
+        return np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts]), meta["columns"]
+
+    def load(self, ticker, interval, start=None, end=None):
+        """
+        Stored bars as a DataFrame, optionally sliced to [start, end).
+        """
+        index, values, columns = self.arrays(ticker, interval, start=start, end=end)
+        lo = np.searchsorted(index, _ts(start).value) if start is not None else 0
+        hi = np.searchsorted(index, _ts(end).value) if end is not None else index.shape[0]
+        return pd.DataFrame(np.array(values[lo:hi]), index=pd.DatetimeIndex(np.array(index[lo:hi]), name="Date"),
+                            columns=columns)
+
+    def write(self, ticker, interval, df: pd.DataFrame, requested_start=None):
+        """
+        Replace the stored series with df. Files are written to temporaries and
+        swapped in, and partitions the new series no longer covers are removed
+        only after the metadata points away from them, so a crash never leaves
+        a half-written series behind.
+        """
+        base = self.path(ticker, interval)
+        os.makedirs(base, exist_ok=True)
+        df = df.sort_index()
+        df = df[~df.index.duplicated(keep="last")]
+        index = _to_ns(df.index)
+        numeric = df.select_dtypes("number")
+        values = numeric.to_numpy(dtype=float)
+        partitions = {}
+        for key, rows in _split(index, _period_unit(interval)):
+            index_path, values_path = self._files(ticker, interval, key)
+            _save(index_path, index[rows])
+            _save(values_path, values[rows])
+            partitions[key] = rows.stop - rows.start
+        self._write_meta(ticker, interval, {
+            "columns": [str(c) for c in numeric.columns],
+            "first": str(pd.Timestamp(index[0])) if index.shape[0] else None,
+            "last": str(pd.Timestamp(index[-1])) if index.shape[0] else None,
+            "rows": int(index.shape[0]),
+            # earliest start ever asked for, so a source with no older history isn't re-queried
+            "requested_start": str(_ts(requested_start)) if requested_start is not None else None,
+            "partitions": partitions,
+        })
+        keep = {p for key in partitions for p in self._files(ticker, interval, key)}
+        stale = glob.glob(os.path.join(base, "*.npy"))
+        for path in stale:
+            if path not in keep:
+                os.remove(path)
+
+    def missing_ranges(self, ticker, interval, start, end):
+        """
+        (start, end) ranges the store lacks for the request. The last stored bar
+        is re-requested so a bar that was still forming gets overwritten.
+        """
+        meta = self.meta(ticker, interval)
+        if meta is None or meta["first"] is None:
+            return [(start, end)]
+        first, last = pd.Timestamp(meta["first"]), pd.Timestamp(meta["last"])
+        if meta.get("requested_start"):
+            first = min(first, pd.Timestamp(meta["requested_start"]))
+        ranges = []
+        if start is not None and _ts(start) < first:
+            ranges.append((start, first))
+        if end is None or _ts(end) > last:
+            ranges.append((last, end))
+        return ranges
+
+    def merge(self, ticker, interval, frames, requested_start=None):
+        """
+        Merge newly fetched frames into the stored series; new rows win on
+        overlap. Only the partitions the new rows fall in are rewritten.
+        """
+        frames = [f for f in frames if f is not None and len(f)]
+        meta = self.meta(ticker, interval)
+        if meta is not None:
+            stored = meta.get("requested_start")
+            if stored:
+                stored = pd.Timestamp(stored)
+                requested_start = stored if requested_start is None else min(_ts(requested_start), stored)
+            if not frames and requested_start is None:
+                return
+        if not frames:
+            if meta is not None:
+                meta["requested_start"] = str(_ts(requested_start))
+                self._write_meta(ticker, interval, meta)
+            return
+        new = pd.concat(frames)
+        new.index = pd.DatetimeIndex(_to_ns(new.index))
+        new = new.select_dtypes("number")
+        new.columns = [str(c) for c in new.columns]
+        if meta is None or "partitions" not in meta or not set(new.columns) <= set(meta["columns"]):
+            # first write, a pre-partitioning store or new columns: rewrite everything
+            frames = [new] if meta is None else [self.load(ticker, interval), new]
+            self.write(ticker, interval, pd.concat(frames), requested_start)
+            return
+
+        new = new.reindex(columns=meta["columns"]).sort_index()
+        new = new[~new.index.duplicated(keep="last")]
+        index = _to_ns(new.index)
+        values = new.to_numpy(dtype=float)
+        partitions = meta["partitions"]
+        for key, rows in _split(index, _period_unit(interval)):
+            index_path, values_path = self._files(ticker, interval, key)
+            part_index, part_values = index[rows], values[rows]
+            if key in partitions:
+                old_index = np.load(index_path)
+                old_values = np.load(values_path)
+                keep = ~np.isin(old_index, part_index)
+                part_index = np.concatenate([old_index[keep], part_index])
+                part_values = np.concatenate([old_values[keep], part_values])
+                order = np.argsort(part_index, kind="stable")
+                part_index, part_values = part_index[order], part_values[order]
+            _save(index_path, part_index)
+            _save(values_path, part_values)
+            partitions[key] = int(part_index.shape[0])
+        meta["partitions"] = dict(sorted(partitions.items()))
+        meta["rows"] = sum(meta["partitions"].values())
+        first, last = pd.Timestamp(index[0]), pd.Timestamp(index[-1])
+        meta["first"] = str(first if meta["first"] is None else min(first, pd.Timestamp(meta["first"])))
+        meta["last"] = str(last if meta["last"] is None else max(last, pd.Timestamp(meta["last"])))
+        meta["requested_start"] = str(_ts(requested_start)) if requested_start is not None else None
+        self._write_meta(ticker, interval, meta)
+
+    def update(self, ticker, start, end, interval="1d"):
+        """
+        Fetch whatever part of [start, end) is missing, merge it in and return
+        the requested slice.
+        """
+        ranges = self.missing_ranges(ticker, interval, start, end)
+        if not ranges:
+            return self.load(ticker, interval, start, end)
+        fetched = [self.fetcher(ticker, s, e, interval) for s, e in ranges]
+        self.merge(ticker, interval, fetched, start)
+        if self.meta(ticker, interval) is None:
+            return pd.DataFrame()
+        return self.load(ticker, interval, start, end)
+
+    def update_many(self, tickers, start, end, interval="1d", pool=None):
+        """
+        update() for many tickers; with a fetch_pool.FetchPool they run in
+        parallel under the pool's limits for the fetcher's `source` (if it has one).
+        """
+        if pool is None:
+            return {t: self.update(t, start, end, interval) for t in tickers}
+        source = getattr(self.fetcher, "source", "fetcher")
+        futures = {t: pool.submit(source, ("update", self.root, t, start, end, interval), self.update, t, start, end,
+                                  interval, cache=False) for t in dict.fromkeys(tickers)}
+        return {t: f.result() for t, f in futures.items()}
@@ -0,0 +1,458 @@
+import numpy as np
+import pandas as pd
+from scipy.linalg import cho_factor, cho_solve
+from scipy.linalg.blas import dsyr
+
+"""
+
+Mean-variance portfolio engine for hundreds to thousands of assets.
+
+RollingCovariance keeps the centered cross-product matrix M2 of the last
+`window` return rows (or of all rows) and updates it with symmetric rank-one
+BLAS updates as rows arrive and leave, O(N^2) per row instead of the O(w N^2)
+of a recomputation:
+
+    add x:     M2 += (n - 1) / n * d d'      d = x - mean before the update
+    remove x:  M2 -= n / (n - 1) * d d'      d = x - mean before the removal
+
+Alongside it a few O(N) power sums (sum |x|^2, sum |x|^4, sum |x|^2 x) give
+the Ledoit-Wolf (2004) shrinkage intensity towards a scaled identity exactly,
+without revisiting the rows:
+
+    sum_k |x_k - m|^4 = a + 4 m'M2 m + n |m|^4 - 4 b.m + 2 c |m|^2
+
+MeanVarianceOptimizer solves min-variance, max-Sharpe and target-return
+portfolios and starts every solve from the previous day's answer. Without
+bounds each is closed-form in cov^-1 1 and cov^-1 mu, and one Cholesky
+factorization of the day's matrix serves all three. With bounds (e.g. long
+only) a primal active-set method holds the assets at their bounds and solves
+for the rest; started from yesterday's weights, only the handful of assets
+whose status changed cost an iteration, each a factorization of the (small)
+free block. Max-Sharpe walks the frontier min 1/2 w'cov w - lam mu'w with
+lam = variance / excess return until it stops moving.
+
+Sample code:
+
+cov = RollingCovariance(returns.columns, window=252)
+opt = MeanVarianceOptimizer(bounds=(0, .05))
+for date, row in returns.iterrows():
+    cov.update(row.to_numpy())
+    if cov.n >= 60:
+        w = opt.max_sharpe(cov.covariance(), cov.mean, rf=.0001)
+w.to_series(cov.assets).nlargest(10)
+cov.shrinkage
+opt.min_variance(cov.covariance())
+opt.frontier(cov.covariance(), cov.mean, np.linspace(.0002, .001, 9))
+
+"""
+
+
+class RollingCovariance:
+    def __init__(self, assets, window=None, refresh=None):
+        """
+        :param assets:  Number of assets or their names
+        :param window:  Rows kept in the estimate (None: all rows seen)
+        :param refresh: Rebuild the sums from the kept rows every `refresh` removals, bounding
+                        the round-off that add/remove cycles accumulate (default 50 windows)
+        """
+        if isinstance(assets, (int, np.integer)):
+            self.assets = list(range(assets))
+        else:
+            self.assets = list(assets)
+        n_assets = len(self.assets)
+        self.window = window
+        self.refresh = refresh if refresh is not None else (50 * window if window else None)
+        self._buffer = np.empty((window, n_assets)) if window else None
+        self._head = 0
+        self._removals = 0
+        self._version = 0
+        self._cache = {}
+        self._clear()
+
+    def _clear(self):
+        n_assets = len(self.assets)
+        self.n = 0
+        self.mean = np.zeros(n_assets)
+        self._m2 = np.zeros((n_assets, n_assets), order="F")     # upper triangle only
+        self._sq = 0.0               # sum |x|^2
+        self._quad = 0.0             # sum |x|^4
+        self._sq_x = np.zeros(n_assets)   # sum |x|^2 x
+
+    # ---- updates ------------------------------------------------------------
+
+    def _add(self, x):
+        self.n += 1
+        d = x - self.mean
+        self.mean += d / self.n
+        if self.n > 1:
+            self._m2 = dsyr((self.n - 1) / self.n, d, a=self._m2, overwrite_a=True)
+        q = x @ x
+        self._sq += q
+        self._quad += q * q
+        self._sq_x += q * x
+
+    def _remove(self, x):
+        if self.n == 1:
+            self._clear()
+            return
+        d = x - self.mean
+        self._m2 = dsyr(-self.n / (self.n - 1), d, a=self._m2, overwrite_a=True)
+        self.n -= 1
+        self.mean -= d / self.n
+        q = x @ x
+        self._sq -= q
+        self._quad -= q * q
+        self._sq_x -= q * x
+
+    def update(self, row):
+        """
+        Add one return row (rank-one update), dropping the oldest row once the window is full.
+        """
+        x = np.asarray(row, dtype=float)
+        if self.window:
+            if self.n == self.window:
+                self._remove(self._buffer[self._head])
+                self._removals += 1
+            self._buffer[self._head] = x
+            self._head = (self._head + 1) % self.window
+        self._add(x)
+        self._version += 1
+        if self.refresh and self._removals >= self.refresh:
+            self.rebuild()
+
+    def update_many(self, rows):
+        """
+        Add a block of rows. Without a window they are merged in one batch
+        (Chan et al.); with one, row by row.
+        """
+        rows = np.atleast_2d(np.asarray(rows, dtype=float))
+        if self.window:
+            for x in rows:
+                self.update(x)
+            return
+        k = rows.shape[0]
+        if k == 0:
+            return
+        block_mean = rows.mean(axis=0)
+        centered = rows - block_mean
+        n = self.n + k
+        delta = block_mean - self.mean
+        m2 = self.symmetric_m2() + centered.T @ centered + np.outer(delta, delta) * (self.n * k / n)
+        self._m2 = np.asfortranarray(m2)
+        self.mean = self.mean + delta * k / n
+        self.n = n
+        q = np.einsum("ij,ij->i", rows, rows)
+        self._sq += q.sum()
+        self._quad += (q * q).sum()
+        self._sq_x += q @ rows
+        self._version += 1
+
+    def rebuild(self):
+        """
+        Recompute every running sum from the rows currently in the window.
+        """
+        if not self.window:
+            return
+        rows = np.roll(self._buffer, -self._head, axis=0)[self.window - self.n:]
+        self._clear()
+        self._removals = 0
+        window, self.window = self.window, None
+        self.update_many(rows)
+        self.window = window
+
+    # ---- estimates ----------------------------------------------------------
+
+    def symmetric_m2(self):
+        upper = np.triu(self._m2)
+        return upper + np.triu(upper, 1).T
+
+    def _ledoit_wolf(self):
+        cached = self._cache.get("lw")
+        if cached is not None and cached[0] == self._version:
+            return cached[1], cached[2]
+        n, p = self.n, len(self.assets)
+        m2 = self.symmetric_m2()
+        sample = m2 / n
+        mu = np.trace(sample) / p
+        target_gap = sample.copy()
+        target_gap.flat[::p + 1] -= mu
+        d2 = np.sum(target_gap ** 2)
+        mm = self.mean @ self.mean
+        fourth = self._quad + 4 * self.mean @ m2 @ self.mean + n * mm ** 2 - 4 * self._sq_x @ self.mean \
+            + 2 * self._sq * mm
+        b2 = max((fourth - n * np.sum(sample ** 2)) / n ** 2, 0.0)
+        shrinkage = min(b2, d2) / d2 if d2 > 0 else 1.0
+        shrunk = (1 - shrinkage) * sample
+        shrunk.flat[::p + 1] += shrinkage * mu
+        self._cache["lw"] = (self._version, shrunk, shrinkage)
+        return shrunk, shrinkage
+
+    @property
+    def shrinkage(self):
+        """
+        Ledoit-Wolf weight on the scaled identity, in [0, 1].
+        """
+        return self._ledoit_wolf()[1]
+
+    def covariance(self, shrink=True, periods_per_year=1):
+        """
+        Covariance of the rows in the window (the shrunk one is cached until the next update).
+
+        :param shrink:           Ledoit-Wolf estimate (which, like theirs, starts from the n-denominator
+                                 sample covariance); False gives the unbiased sample covariance
+        :param periods_per_year: Scale to annualize (1 leaves it per period)
+        """
+        if self.n < 2:
+            raise ValueError("need at least two return rows")
+        if shrink:
+            cov = self._ledoit_wolf()[0]
+        else:
+            cov = self.symmetric_m2() / (self.n - 1)
+        return cov * periods_per_year if periods_per_year != 1 else cov
+
+    def to_frame(self, shrink=True):
+        return pd.DataFrame(self.covariance(shrink), index=self.assets, columns=self.assets)
+
+    def __repr__(self):
+        return f"RollingCovariance(assets={len(self.assets)}, n={self.n}, window={self.window})"
+
+
+class Allocation:
+    __slots__ = ("weights", "expected_return", "volatility", "sharpe", "iterations")
+
+    def __init__(self, weights, cov, mu, rf, iterations):
+        self.weights = weights
+        self.expected_return = float(weights @ mu) if mu is not None else np.nan
+        self.volatility = float(np.sqrt(max(weights @ cov @ weights, 0.0)))
+        self.sharpe = (self.expected_return - rf) / self.volatility if self.volatility > 0 else np.nan
+        self.iterations = iterations
+
+    def to_series(self, assets=None):
+        return pd.Series(self.weights, index=assets, name="weight")
+
+    def __repr__(self):
+        return (f"Allocation(return={self.expected_return:.6g}, volatility={self.volatility:.6g}, "
+                f"sharpe={self.sharpe:.4g}, iterations={self.iterations})")
+
+
+def _extreme_return(mu, lo, hi, direction):
+    """
+    Bounded weights summing to 1 with the highest (direction 1) or lowest (-1)
+    return: everything at lo, then the budget left filled in order of return.
+    """
+    w = lo.copy()
+    budget = 1 - lo.sum()
+    for i in np.argsort(-direction * mu, kind="stable"):
+        take = min(hi[i] - lo[i], budget)
+        w[i] += take
+        budget -= take
+        if budget <= 0:
+            break
+    return w
+
+
+class MeanVarianceOptimizer:
+    def __init__(self, bounds=None, max_iter=200):
+        """
+        :param bounds:   None for unconstrained weights summing to 1 (shorts allowed), or
+                         (lo, hi) scalars or per-asset arrays, e.g. (0, 1) for long only
+        :param max_iter: Cap on active-set iterations per solve
+        """
+        self.bounds = bounds
+        self.max_iter = max_iter
+        self._warm = {}
+        self._factor_cache = None
+
+    def reset(self):
+        """
+        Forget the warm starts (e.g. after the asset universe changes).
+        """
+        self._warm.clear()
+        self._factor_cache = None
+
+    def _limits(self, p):
+        if self.bounds is None:
+            return np.full(p, -np.inf), np.full(p, np.inf)
+        lo, hi = (np.broadcast_to(np.asarray(b, dtype=float), p).copy() for b in self.bounds)
+        if lo.sum() > 1 or hi.sum() < 1 or (lo > hi).any():
+            raise ValueError("bounds leave no weights summing to 1")
+        return lo, hi
+
+    def _factor(self, cov, free):
+        """
+        Cholesky factor of cov restricted to the free assets, reused while the
+        same free set and the same block values come back (e.g. across the
+        problems of one day). The cache holds a copy of the block and compares
+        contents, O(m^2) against the O(m^3) factorization, so a matrix changed
+        in place is never served a stale factor.
+        """
+        key = free.tobytes()
+        block = cov if free.all() else cov[np.ix_(free, free)]
+        cached = self._factor_cache
+        if cached is not None and cached[0] == key and np.array_equal(cached[1], block):
+            return cached[2]
+        factor = cho_factor(block)
+        self._factor_cache = (key, block.copy() if block is cov else block, factor)
+        return factor
+
+    def _start(self, key, p, score):
+        """
+        Feasible starting weights: the last solution stored under key, else the
+        last minimum-variance one, else the bounded portfolio filled in order of score.
+        """
+        for name in (key, "min_variance"):
+            w = self._warm.get(name)
+            if w is not None and w.shape[0] == p:
+                return w.copy()
+        if self.bounds is None:
+            return np.full(p, 1.0 / p)
+        return _extreme_return(score, *self._limits(p), 1)
+
+    def _solve(self, cov, linear, A, b, w):
+        """
+        argmin 1/2 w'cov w - linear'w subject to A w = b and the bounds, by a
+        primal active-set method from the feasible point w.
+
+        The assets at a bound are held there while the rest solve the
+        equality-constrained problem; the move towards that solution stops at
+        the first bound it hits, which joins the set, and at a full step the
+        bound with the most wrong-signed multiplier is released. Starting from
+        yesterday's weights only the few assets whose status changed cost a pass.
+
+        :return: (weights, iterations)
+        """
+        p, m = cov.shape[0], A.shape[0]
+        lo, hi = self._limits(p)
+        linear = np.broadcast_to(np.asarray(linear, dtype=float), p)
+        at_lo, at_hi = w <= lo, w >= hi
+        # keep m assets free so the multipliers of A w = b are pinned down
+        short = m - int((~(at_lo | at_hi)).sum())
+        if short > 0:
+            release = np.flatnonzero(at_lo | at_hi)[:short]
+            at_lo[release] = at_hi[release] = False
+        eps_z = 1e-12 * max(np.abs(linear).max(), np.diag(cov).max())
+
+        for it in range(1, self.max_iter + 1):
+            free = ~(at_lo | at_hi)
+            fixed = ~free
+            A_free = A[:, free]
+            factor = self._factor(cov, free)
+            g = cho_solve(factor, linear[free] - cov[np.ix_(free, fixed)] @ w[fixed])
+            G = cho_solve(factor, A_free.T)
+            nu = np.linalg.lstsq(A_free @ G, A_free @ g - (b - A[:, fixed] @ w[fixed]), rcond=None)[0]
+            step = g - G @ nu - w[free]
+            if free.sum() > m:
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    room = np.where(step < 0, (lo[free] - w[free]) / step,
+                                    np.where(step > 0, (hi[free] - w[free]) / step, np.inf))
+                j = int(np.argmin(room))
+                if room[j] < 1:
+                    w[free] += max(room[j], 0.0) * step
+                    i = np.flatnonzero(free)[j]
+                    if step[j] < 0:
+                        w[i], at_lo[i] = lo[i], True
+                    else:
+                        w[i], at_hi[i] = hi[i], True
+                    continue
+            w[free] += step
+            # multipliers of the held bounds: positive keeps a weight at lo, negative at hi
+            z = cov @ w - linear + A.T @ nu
+            wrong = np.where(at_lo, -z, np.where(at_hi, z, 0.0))
+            i = int(np.argmax(wrong))
+            if wrong[i] <= eps_z:
+                return np.clip(w, lo, hi), it
+            at_lo[i] = at_hi[i] = False
+        raise RuntimeError(f"active-set method did not finish in {self.max_iter} iterations")
+
+    # ---- problems -----------------------------------------------------------
+
+    def min_variance(self, cov, mu=None, rf=0.0):
+        """
+        Global minimum-variance portfolio.
+
+        :param mu: Expected returns, only used to report the allocation's return and Sharpe
+        """
+        cov = np.asarray(cov, dtype=float)
+        p = cov.shape[0]
+        w0 = self._start("min_variance", p, -np.diag(cov))
+        w, iterations = self._solve(cov, 0.0, np.ones((1, p)), np.ones(1), w0)
+        self._warm["min_variance"] = w
+        return Allocation(w, cov, mu, rf, iterations)
+
+    def max_sharpe(self, cov, mu, rf=0.0, max_rounds=100):
+        """
+        Tangency portfolio maximizing (mu'w - rf) / sqrt(w'cov w).
+
+        :param rf: Riskless return per period, in the units of mu
+        """
+        cov = np.asarray(cov, dtype=float)
+        mu = np.asarray(mu, dtype=float)
+        p = cov.shape[0]
+        excess = mu - rf
+        if self.bounds is None:
+            y = cho_solve(self._factor(cov, np.ones(p, dtype=bool)), excess)
+            if y.sum() <= 0:
+                raise ValueError("no tangency portfolio: rf is above the minimum-variance portfolio's return")
+            return Allocation(y / y.sum(), cov, mu, rf, 1)
+        if _extreme_return(excess, *self._limits(p), 1) @ excess <= 0:
+            raise ValueError("no feasible portfolio earns more than rf")
+
+        # frontier points solve min 1/2 w'cov w - lam excess'w; at the tangency portfolio
+        # lam = variance / excess return, so iterate that from yesterday's lam
+        ones, one = np.ones((1, p)), np.ones(1)
+        w = self._start("max_sharpe", p, excess / np.sqrt(np.diag(cov)))
+        lam = self._warm.get("max_sharpe_lam", 1.0)
+        iterations = 0
+        for _ in range(max_rounds):
+            w, it = self._solve(cov, lam * excess, ones, one, w)
+            iterations += it
+            gain = w @ excess
+            if gain <= 0:
+                lam *= 4
+                continue
+            lam_next = (w @ cov @ w) / gain
+            if abs(lam_next - lam) <= 1e-10 * lam:
+                break
+            lam = lam_next
+        self._warm["max_sharpe"], self._warm["max_sharpe_lam"] = w, lam
+        return Allocation(w, cov, mu, rf, iterations)
+
+    def target_return(self, cov, mu, target, rf=0.0):
+        """
+        Minimum-variance portfolio earning mu'w = target.
+        """
+        cov = np.asarray(cov, dtype=float)
+        mu = np.asarray(mu, dtype=float)
+        p = cov.shape[0]
+        if np.ptp(mu) == 0:
+            raise ValueError("expected returns are all equal; only their common value can be targeted")
+        w0 = self._start("target_return", p, -np.diag(cov))
+        if self.bounds is not None:
+            # mix the start with a feasible portfolio on the other side of the target, preferring
+            # the day's other solutions (which share most of its holdings) to the extreme one
+            lo, hi = self._limits(p)
+            side = np.sign(w0 @ mu - target)
+            edge = _extreme_return(mu, lo, hi, -side if side else 1)
+            if (edge @ mu - target) * side > 0 and not np.isclose(edge @ mu, target):
+                raise ValueError("target return is outside the range the bounds allow")
+            others = [self._warm.get(k) for k in ("max_sharpe", "min_variance")]
+            partner = next((o for o in others if o is not None and o.shape[0] == p
+                            and (o @ mu - target) * side <= 0), edge)
+            if partner @ mu != w0 @ mu:
+                w0 += (target - w0 @ mu) / ((partner - w0) @ mu) * (partner - w0)
+        w, iterations = self._solve(cov, 0.0, np.vstack([np.ones(p), mu]), np.array([1.0, target]), w0)
+        self._warm["target_return"] = w
+        return Allocation(w, cov, mu, rf, iterations)
+
+    def frontier(self, cov, mu, targets, rf=0.0):
+        """
+        Efficient frontier through the given target returns, each solve warm-started by the last.
+
+        :return: DataFrame of target, return, volatility and Sharpe per point
+        """
+        cov = np.asarray(cov, dtype=float)
+        rows = []
+        for target in np.sort(np.asarray(targets, dtype=float)):
+            a = self.target_return(cov, mu, target, rf)
+            rows.append((target, a.expected_return, a.volatility, a.sharpe))
+        return pd.DataFrame(rows, columns=["target", "return", "volatility", "sharpe"])
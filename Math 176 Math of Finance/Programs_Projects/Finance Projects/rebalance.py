@@ -0,0 +1,232 @@
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+"""
+
+Constant-mix rebalancing backtests (Shannon's demon) over a whole grid of
+target weights, drift thresholds and calendar frequencies.
+
+A configuration (w, k, thr) checks the portfolio every k bars and, if some
+weight has drifted more than thr from its target (thr = 0: always), trades
+back to w. Between checks nothing happens, so with L = log cumulative growth
+of each asset the value path inside a block is a single product
+
+    V_t / V_s = h_s . exp(L_t - L_s)
+
+for all configurations with the same k at once. Every segment between
+rebalances starts from the target weights, so once the rebalance dates are
+known the whole value path, trades and costs follow in one vectorized pass.
+Calendar configurations (thr = 0) rebalance at every check; for banded ones
+the first band crossing after each rebalance is found with an argmax over the
+drifted weights of a whole stretch of checks, so that search loops once per
+rebalance rather than once per bar.
+
+The volatility-harvesting return is the annualized log growth of the
+rebalanced portfolio minus that of buy-and-hold from the same initial weights.
+
+Sample code:
+
+store = MarketStore('data')
+returns = returns_from_store(store, ['SPY', 'TLT'], '2005-01-01', '2025-01-01', cash_rate=.02)
+result = backtest_grid(returns, weight_grid(3, .1), thresholds=[0, .02, .05, .1],
+                       frequencies=[1, 5, 21, 63], cost=.0005, workers=4)
+result.sort_values('harvest', ascending=False).head()
+
+"""
+
+
+def returns_from_store(store, tickers, start=None, end=None, interval="1d", column="Adj Close", cash_rate=None,
+                       periods_per_year=252):
+    """
+    Aligned simple returns of stored series (see market_store.MarketStore),
+    keeping only dates every ticker traded.
+
+    :param column:    Price column to use; falls back to 'Close' if missing
+    :param cash_rate: Annual rate of an extra riskless 'CASH' column (the demon's other leg)
+    :return:          DataFrame (dates x tickers) of simple returns
+    """
+    closes = {}
+    for t in tickers:
+        df = store.load(t, interval, start, end)
+        closes[t] = df[column] if column in df else df["Close"]
+    prices = pd.DataFrame(closes).dropna()
+    returns = prices.pct_change().iloc[1:]
+    if cash_rate is not None:
+        returns["CASH"] = (1 + cash_rate) ** (1 / periods_per_year) - 1
+    return returns
+
+
+def weight_grid(n_assets, step=0.1, min_weight=0.0):
+    """
+    Every weight vector on the simplex with entries on multiples of step.
+
+    :return: (combinations, n_assets) array
+    """
+    units = int(round(1 / step))
+    rows = [c for c in itertools.product(range(units + 1), repeat=n_assets - 1) if sum(c) <= units]
+    grid = np.array([list(c) + [units - sum(c)] for c in rows], dtype=float) / units
+    return grid[(grid >= min_weight - 1e-12).all(axis=1)]
+
+
+def _band_crossings(log_growth, weights, thresholds, checks, max_window):
+    """
+    Rebalance dates of banded configurations.
+
+    Every pass moves each unfinished configuration from its last rebalance to
+    the first check in the next window where a weight has left its band
+    (drifted weights over the whole window at once, then an argmax on the
+    breach mask), or past the window if none has. The loop therefore runs
+    about once per rebalance, not once per check. The window adapts to twice
+    the typical distance to a crossing, up to `max_window` checks.
+
+    :param checks: Bars where drift is checked
+    :return:       (configs, bars + 1) bool mask of rebalance bars
+    """
+    g = weights.shape[0]
+    marks = np.zeros((g, log_growth.shape[0]), dtype=bool)
+    start = np.zeros(g, dtype=int)            # bar of the last rebalance
+    nxt = np.zeros(g, dtype=int)              # first check not yet searched
+    window = max_window
+    active = np.arange(g) if checks.size else np.arange(0)
+    while active.size:
+        idx = nxt[active][:, None] + np.arange(window)                          # (a, window) check indices
+        bars = checks[np.minimum(idx, checks.size - 1)]
+        growth = np.exp(log_growth[bars] - log_growth[start[active]][:, None])  # (a, window, assets)
+        w = weights[active][:, None]
+        drift = w * growth / np.einsum("atk,ak->at", growth, weights[active])[..., None]
+        breach = (idx < checks.size) & (np.abs(drift - w).max(axis=2) > thresholds[active][:, None])
+        hit = breach.any(axis=1)
+        first = breach.argmax(axis=1)
+        crossed = bars[hit, first[hit]]
+        marks[active[hit], crossed] = True
+        start[active[hit]] = crossed
+        nxt[active] += np.where(hit, first + 1, window)
+        active = active[nxt[active] < checks.size]
+        if hit.any():
+            window = int(min(max(2 * np.median(first[hit] + 1), 1), max_window))
+        else:
+            window = min(2 * window, max_window)
+    return marks
+
+
+def _scan(log_growth, weights, thresholds, every, cost, horizon=252):
+    """
+    Backtest configurations that share one check frequency.
+
+    :param log_growth: (bars + 1, assets) cumulative log growth, row 0 all zeros
+    :param weights:    (configs, assets) targets
+    :param thresholds: (configs,) drift bands
+    :param every:      Check every `every` bars
+    :param horizon:    Longest stretch of bars searched per step for a band crossing
+    :return:           dict of (configs,) metric arrays
+    """
+    n_bars = log_growth.shape[0] - 1
+    g = weights.shape[0]
+    checks = np.arange(every, n_bars, every)
+    calendar = thresholds <= 0
+    marks = np.zeros((g, n_bars + 1), dtype=bool)
+    marks[np.ix_(calendar, checks)] = True
+    banded = np.flatnonzero(~calendar)
+    if banded.size:
+        marks[banded] = _band_crossings(log_growth, weights[banded], thresholds[banded], checks,
+                                        max(horizon // every, 1))
+
+    # every segment starts from the target weights, so with s the last rebalance before bar t
+    # the value path is V_t / V_s = w . exp(L_t - L_s) for all configurations and bars at once
+    t = np.arange(n_bars + 1)
+    seg = np.maximum.accumulate(np.where(marks, t, 0), axis=1)[:, :-1]       # (g, bars) segment start of bars 1..n
+    path = np.zeros((g, n_bars))
+    for k in range(weights.shape[1]):
+        path += weights[:, k:k + 1] * np.exp(log_growth[1:, k] - log_growth[seg, k])
+    log_path = np.log(path)
+    prev = np.zeros_like(log_path)
+    prev[:, 1:] = log_path[:, :-1]
+    prev[marks[:, :-1]] = 0.0
+    daily = log_path - prev
+
+    rows, bars = np.nonzero(marks)
+    w = weights[rows]
+    growth = np.exp(log_growth[bars] - log_growth[seg[rows, bars - 1]])
+    drift = w * growth / (w * growth).sum(axis=1, keepdims=True)
+    traded = np.abs(drift - w).sum(axis=1) / 2
+    if cost:
+        # buying and selling `traded` each costs cost * traded of wealth, booked on the next bar
+        daily[rows, bars] += np.log1p(-2 * cost * traded)
+
+    wealth = np.cumsum(daily, axis=1)
+    running = np.maximum.accumulate(np.maximum(wealth, 0.0), axis=1)
+    return {"log_wealth": wealth[:, -1], "max_drawdown_log": (running - wealth).max(axis=1),
+            "sum_r": daily.sum(axis=1), "sum_r2": (daily ** 2).sum(axis=1),
+            "turnover": np.bincount(rows, traded, minlength=g), "rebalances": marks.sum(axis=1)}
+
+
+def _run_chunk(log_growth, weights, thresholds, frequencies, cost):
+    out = {}
+    for every in np.unique(frequencies):
+        rows = np.flatnonzero(frequencies == every)
+        res = _scan(log_growth, weights[rows], thresholds[rows], int(every), cost)
+        for key, values in res.items():
+            out.setdefault(key, np.zeros(frequencies.shape[0], dtype=values.dtype))[rows] = values
+    return out
+
+
+def backtest_grid(returns, weights, thresholds=(0.0,), frequencies=(21,), cost=0.0, periods_per_year=252,
+                  workers=1, chunks_per_worker=4):
+    """
+    Constant-mix backtest of every (weights, threshold, frequency) combination.
+
+    :param returns:     DataFrame or (bars, assets) array of simple returns
+    :param weights:     (n, assets) target weight vectors (e.g. weight_grid); rows should sum to 1
+    :param thresholds:  Drift bands: rebalance when max |h - w| exceeds it; 0 rebalances at every check
+    :param frequencies: Check every k bars (1 = daily threshold monitoring)
+    :param cost:        Proportional cost per unit of notional traded
+    :param workers:     Processes to split the grid across
+    :return:            DataFrame, one row per configuration, with annualized return, vol,
+                        buy-and-hold return, harvest, turnover, rebalances and max drawdown
+    """
+    names = list(returns.columns) if isinstance(returns, pd.DataFrame) else [f"a{i}" for i in range(np.shape(returns)[1])]
+    r = np.asarray(returns, dtype=float)
+    weights = np.atleast_2d(np.asarray(weights, dtype=float))
+    if weights.shape[1] != r.shape[1]:
+        raise ValueError("weights need one column per asset")
+    log_growth = np.vstack([np.zeros(r.shape[1]), np.cumsum(np.log1p(r), axis=0)])
+
+    combos = list(itertools.product(range(weights.shape[0]), thresholds, frequencies))
+    w_idx = np.array([c[0] for c in combos])
+    thr = np.array([c[1] for c in combos], dtype=float)
+    freq = np.array([c[2] for c in combos], dtype=int)
+    W = weights[w_idx]
+
+    if workers <= 1:
+        res = _run_chunk(log_growth, W, thr, freq, cost)
+    else:
+        # keep each frequency's rows together so chunks stay efficient
+        order = np.argsort(freq, kind="stable")
+        parts = np.array_split(order, workers * chunks_per_worker)
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            futures = [ex.submit(_run_chunk, log_growth, W[p], thr[p], freq[p], cost) for p in parts if p.size]
+            results = [f.result() for f in futures]
+        res = {}
+        for p, part in zip((p for p in parts if p.size), results):
+            for key, values in part.items():
+                res.setdefault(key, np.zeros(freq.shape[0], dtype=values.dtype))[p] = values
+
+    n_bars = r.shape[0]
+    years = n_bars / periods_per_year
+    buy_hold = np.log(W @ np.exp(log_growth[-1])) / years
+    mean = res["sum_r"] / n_bars
+    var = np.maximum(res["sum_r2"] / n_bars - mean ** 2, 0)
+
+    df = pd.DataFrame(W, columns=[f"w_{n}" for n in names])
+    df["threshold"] = thr
+    df["every"] = freq
+    df["ann_log_return"] = res["log_wealth"] / years
+    df["ann_vol"] = np.sqrt(var * periods_per_year)
+    df["buy_hold_log_return"] = buy_hold
+    df["harvest"] = df["ann_log_return"] - buy_hold
+    df["ann_turnover"] = res["turnover"] / years
+    df["rebalances"] = res["rebalances"]
+    df["max_drawdown"] = 1 - np.exp(-res["max_drawdown_log"])
+    return df
@@ -1,9 +1,13 @@
 import yfinance as yf
 import pandas as pd
-import numpy as np
 import os
+from market_store import MarketStore
+
+def OHLCV (list_tickers, start, end, interval, store: MarketStore = None):
+    # with a store only the bars missing on disk are downloaded
+    if store is not None:
+        return store.update_many(list_tickers, start, end, interval)
 
-def OHLCV (list_tickers, start, end, interval):
     ohlv = {}
     for t in list_tickers:
         ohlv[t] = yf.download(t, start= start, end= end, interval= interval)
@@ -11,7 +15,7 @@ def OHLCV (list_tickers, start, end, interval):
     return ohlv
 
 
-def download_to_csv(dataframe, name: str) -> None:
+def download_to_csv(dataframe, name: str, directory: str = None) -> None:
     try:
         # Check if the input is a pandas DataFrame
         if not isinstance(dataframe, pd.DataFrame):
@@ -19,7 +23,8 @@ def download_to_csv(dataframe, name: str) -> None:
         
         # Construct the full file path
         name = name + '.csv'
-        directory = r"C:\Users\thoma\Desktop\Data\Finance"
+        if directory is None:
+            directory = os.environ.get("FINANCE_DATA_DIR", r"C:\Users\thoma\Desktop\Data\Finance")
         file_path = os.path.join(directory, name)
         
         # Save the dataframe to a CSV file